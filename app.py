@@ -1,19 +1,10 @@
 # app.py (Home + Navbar)
-import nltk
-
-# download minimal data quietly if not present
-try:
-    nltk.data.find("tokenizers/punkt")
-except LookupError:
-    nltk.download("punkt", quiet=True)
-
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords", quiet=True)
-
+# NLTK data (punkt, stopwords) is bundled in ./nltk_data and found by the
+# summarizer on first use: nothing is checked or downloaded at launch.
+import os
 import streamlit as st
-from PIL import Image
+
+HOMEPAGE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "Homepage.png")
 
 # ------------------ Page Config ------------------
 st.set_page_config(
@@ -76,7 +67,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ------------------ Navbar Buttons ------------------
-cols = st.columns(4)
+cols = st.columns(5)
 
 with cols[0]:
     if st.button("Analysis"):
@@ -91,20 +82,22 @@ with cols[2]:
         st.switch_page("pages/3_Sentiment_Analysis.py")
 
 with cols[3]:
+    if st.button("Large Chats"):
+        st.switch_page("pages/5_Large_Chats.py")
+
+with cols[4]:
     if st.button("About"):
         st.switch_page("pages/4_About.py")
 
 
 # ------------------ Homepage Image ------------------
-try:
-    image = Image.open("frontend/Homepage.png")
+if os.path.exists(HOMEPAGE_IMAGE):
     col1, col2, col3 = st.columns([1, 3, 1])
 
     with col2:
-        st.image(image, use_container_width=True)
-  # FIXED
+        st.image(HOMEPAGE_IMAGE, use_container_width=True)
 
-except:
+else:
     st.warning("⚠ Homepage image not found. Add it in: `frontend/Homepage.png`")
 
 
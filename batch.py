@@ -0,0 +1,298 @@
+# batch.py — HEADLESS BATCH ANALYSIS OF EXPORTED CHATS (NO STREAMLIT)
+#
+# Usage:
+#   python batch.py exports/ -o results/
+#   python batch.py "exports/**/*.zip" more/chat.txt -o results/ --pdf --workers 4
+#
+# Every .txt / .zip export is analyzed with helper.analyze_text() in a
+# process pool (one process per core by default). For each chat the output
+# directory gets <name>.summary.json, <name>.messages.arrow (the message
+# frame, Arrow IPC; needs pyarrow, else the chat's record has a
+# "messages_error") and optionally <name>.pdf; batch_summary.json lists
+# every chat plus the run's throughput. Exits non-zero if any chat failed.
+# With --sketch, chats are summarized in bounded memory by sketches.py
+# instead (approximate top lists, no message frame / PDF / sentiment).
+
+import os
+import sys
+import json
+import glob
+import time
+import pathlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pdf_report import SECTIONS
+from chat_source import EXPORT_SUFFIXES
+
+SUMMARY_FILE = "batch_summary.json"
+TOP_N = 25
+
+
+# --------------------------------------------------------
+#                INPUTS
+# --------------------------------------------------------
+def find_exports(inputs):
+    """
+    Export paths for a list of files, directories (searched recursively)
+    and glob patterns, in a stable order without duplicates.
+    """
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = glob.glob(os.path.join(item, "**", "*"), recursive=True)
+        elif os.path.isfile(item):
+            paths = [item]
+        else:
+            paths = glob.glob(item, recursive=True)
+        found.extend(sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(EXPORT_SUFFIXES)))
+
+    seen, exports = set(), []
+    for path in found:
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            exports.append(path)
+    return exports
+
+
+def output_names(paths):
+    """
+    A distinct output name per export: the file stem, numbered on clashes.
+    """
+    names, used = [], set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}"
+        used.add(name)
+        names.append(name)
+    return names
+
+
+# --------------------------------------------------------
+#                ONE CHAT (RUNS IN A WORKER)
+# --------------------------------------------------------
+def _json_default(value):
+    # numpy scalars / timestamps in metric values
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False, default=_json_default)
+    os.replace(tmp, path)
+
+
+def _write_arrow(path, df):
+    # the message frame as an uncompressed Arrow IPC file
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def chat_summary(report, summary_sentences=0):
+    """
+    JSON-ready summary of an analyzed chat.
+    """
+    df = report["messages_df"]
+    summary = {
+        "overview": report["overview"],
+        "participants": int(df["user"].nunique()),
+        "top_senders": report["top_senders"][:TOP_N],
+        "most_common_words": report["most_common_words"][:TOP_N],
+        "emoji_analysis": report["emoji_analysis"][:TOP_N],
+        "mean_sentiment": float(report["sentiment"].mean()) if len(df) else None,
+        "dedup_ratio": round(report["unique_messages"].ratio, 3),
+    }
+    if summary_sentences:
+        from summarizer import summarize_messages
+
+        report["summary"] = summarize_messages(df["message"], max_sentences=summary_sentences, timings=report["timings"])
+        summary["summary"] = report["summary"]
+    return summary
+
+
+def analyze_export(path, name, out_dir, pdf=False, sections=(), summary_sentences=0, sketch=False):
+    """
+    Analyze one export and write its outputs; returns its batch record.
+    Failures are recorded in the returned dict rather than raised.
+    """
+    record = {"source": path, "name": name, "bytes": os.path.getsize(path)}
+    start = time.perf_counter()
+    try:
+        if sketch:
+            _sketch_export(path, name, out_dir, record)
+        else:
+            _report_export(path, name, out_dir, record, pdf, sections, summary_sentences)
+    except Exception as exc:
+        record["error"] = f"{type(exc).__name__}: {exc}"
+
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def _report_export(path, name, out_dir, record, pdf, sections, summary_sentences):
+    # full analysis: summary, message frame and optional PDF
+    from helper import analyze_text
+
+    # a .zip is read from its chat member, a .txt memory-mapped
+    report = analyze_text(pathlib.Path(path))
+    if "error" in report:
+        raise ValueError(report["error"])
+
+    summary = chat_summary(report, summary_sentences)
+    record["messages"] = summary["overview"]["total_messages"]
+    record["participants"] = summary["participants"]
+
+    outputs = {"summary": os.path.join(out_dir, f"{name}.summary.json")}
+    outputs["messages"] = os.path.join(out_dir, f"{name}.messages.arrow")
+    try:
+        _write_arrow(outputs["messages"], report["messages_df"])
+    except ImportError as exc:
+        # keep the chat's other outputs; the record says what is missing
+        del outputs["messages"]
+        record["messages_error"] = f"{type(exc).__name__}: {exc}"
+    if pdf:
+        from pdf_report import export_report_pdf
+
+        outputs["pdf"] = os.path.join(out_dir, f"{name}.pdf")
+        try:
+            export_report_pdf(report, output_path=outputs["pdf"], sections=sections)
+        except (OSError, ValueError) as exc:
+            # e.g. missing fonts: keep the chat's other outputs
+            del outputs["pdf"]
+            record["pdf_error"] = f"{type(exc).__name__}: {exc}"
+
+    summary["source"] = path
+    summary["timings"] = report["timings"]
+    _write_json(outputs["summary"], summary)
+    record["outputs"] = outputs
+
+
+def _sketch_export(path, name, out_dir, record):
+    # approximate mode: only the sketch summary is written
+    from sketches import sketch_chat
+
+    summary = sketch_chat(pathlib.Path(path)).summary(TOP_N)
+    if not summary["overview"]["total_messages"]:
+        raise ValueError("Invalid or empty chat file.")
+    record["messages"] = summary["overview"]["total_messages"]
+    record["participants"] = summary["participants_estimate"]
+
+    outputs = {"summary": os.path.join(out_dir, f"{name}.summary.json")}
+    summary["source"] = path
+    _write_json(outputs["summary"], summary)
+    record["outputs"] = outputs
+
+
+# --------------------------------------------------------
+#                BATCH
+# --------------------------------------------------------
+def run_batch(paths, out_dir, workers=None, pdf=False, sections=(), summary_sentences=0, log=None, sketch=False):
+    """
+    Analyze every export in `paths` over `workers` processes (all cores by
+    default; 1 runs in this process). Returns the batch summary dict, also
+    written to out_dir/batch_summary.json. `sketch` summarizes every chat
+    approximately in bounded memory (see sketches.py).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    names = output_names(paths)
+    jobs = [(path, name, out_dir, pdf, tuple(sections), summary_sentences, sketch) for path, name in zip(paths, names)]
+
+    records = {}
+    start = time.perf_counter()
+    if workers == 1:
+        for job in jobs:
+            records[job[0]] = record = analyze_export(*job)
+            _log_record(log, record, len(records), len(jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(analyze_export, *job) for job in jobs]
+            for future in as_completed(futures):
+                record = future.result()
+                records[record["source"]] = record
+                _log_record(log, record, len(records), len(jobs))
+    seconds = time.perf_counter() - start
+
+    chats = [records[path] for path in paths]
+    done = [r for r in chats if "error" not in r]
+    messages = sum(r["messages"] for r in done)
+    megabytes = sum(r["bytes"] for r in chats) / 1024 / 1024
+    batch = {
+        "workers": workers,
+        "chats": len(chats),
+        "failed": len(chats) - len(done),
+        "messages": messages,
+        "megabytes": round(megabytes, 2),
+        "seconds": round(seconds, 3),
+        "messages_per_s": round(messages / seconds) if seconds else None,
+        "megabytes_per_s": round(megabytes / seconds, 2) if seconds else None,
+        "results": chats,
+    }
+    _write_json(os.path.join(out_dir, SUMMARY_FILE), batch)
+    return batch
+
+
+def _log_record(log, record, done, total):
+    if log is None:
+        return
+    if "error" in record:
+        log(f"[{done}/{total}] {record['source']}: error: {record['error']}")
+    else:
+        note = "".join(
+            f" ({label} skipped: {record[key]})"
+            for key, label in (("messages_error", "messages"), ("pdf_error", "pdf"))
+            if key in record
+        )
+        log(f"[{done}/{total}] {record['source']}: {record['messages']:,} messages in {record['seconds']:.2f} s{note}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Analyze exported WhatsApp chats without the Streamlit app")
+    ap.add_argument("inputs", nargs="+", help="export files, directories or glob patterns (.txt / .zip)")
+    ap.add_argument("-o", "--output", default="batch_output", help="directory for the per-chat outputs")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    ap.add_argument("--pdf", action="store_true", help="also write a PDF report per chat")
+    ap.add_argument("--sections", default="", help="extra PDF sections, comma-separated (heatmap,timeline)")
+    ap.add_argument("--summary", type=int, default=0, metavar="N",
+                    help="add an N-sentence extractive summary to each chat")
+    ap.add_argument("--sketch", action="store_true",
+                    help="approximate summaries in bounded memory, for very large chats (no PDF / messages file)")
+    args = ap.parse_args(argv)
+
+    paths = find_exports(args.inputs)
+    if not paths:
+        ap.error("no .txt / .zip exports found")
+
+    def log(line):
+        print(line, file=sys.stderr)
+
+    sections = [s for s in args.sections.split(",") if s]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        ap.error("unknown PDF sections: " + ", ".join(sorted(unknown)))
+    if args.sketch and (args.pdf or args.summary):
+        ap.error("--sketch cannot be combined with --pdf or --summary")
+    batch = run_batch(paths, args.output, args.workers, args.pdf, sections, args.summary, log=log, sketch=args.sketch)
+
+    print(
+        f"{batch['chats']} chats ({batch['failed']} failed), {batch['messages']:,} messages, "
+        f"{batch['megabytes']:.1f} MB in {batch['seconds']:.2f} s on {batch['workers']} workers: "
+        f"{batch['messages_per_s'] or 0:,} messages/s, {batch['megabytes_per_s'] or 0:.2f} MB/s"
+    )
+    return 1 if batch["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/bench_datetime.py — INFERRED vs DETECTED-FORMAT DATETIME PARSING
+#
+# Usage: python benchmarks/bench_datetime.py [--rows 200000]
+
+import os
+import sys
+import time
+import random
+import argparse
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from chat_parser import parse_stream, parse_datetimes
+
+# (label, header template) — one per supported layout
+LAYOUTS = [
+    ("android-12h (US)", "{m}/{d}/{yy}, {h12}:{mi:02d} {ampm} - User{u}: hello"),
+    ("android-24h (dd/mm)", "{d:02d}/{m:02d}/{yyyy}, {h:02d}:{mi:02d} - User{u}: hello"),
+    ("android-24h (dd.mm)", "{d:02d}.{m:02d}.{yy}, {h:02d}:{mi:02d} - User{u}: hello"),
+    ("ios-24h", "[{d:02d}/{m:02d}/{yy}, {h:02d}:{mi:02d}:{s:02d}] User{u}: hello"),
+    ("ios-12h", "[{m}/{d}/{yy}, {h12}:{mi:02d}:{s:02d} {ampm}] User{u}: hello"),
+    # media lines: a left-to-right mark before the header and the placeholder
+    ("ios-24h (media)", "\u200e[{d:02d}/{m:02d}/{yy}, {h:02d}:{mi:02d}:{s:02d}] User{u}: \u200eimage omitted"),
+]
+
+
+def synth_lines(template, rows, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(rows):
+        h = rnd.randrange(24)
+        yield template.format(
+            d=rnd.randint(1, 28), m=rnd.randint(1, 12),
+            yy=rnd.randint(18, 25), yyyy=rnd.randint(2018, 2025),
+            h=h, h12=(h % 12) or 12, ampm="AM" if h < 12 else "PM",
+            mi=rnd.randrange(60), s=rnd.randrange(60), u=rnd.randrange(50),
+        )
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inferred vs detected-format datetime parsing")
+    ap.add_argument("--rows", type=int, default=200_000)
+    args = ap.parse_args()
+
+    print(f"{'layout':<22} {'format':<24} {'inferred s':>11} {'explicit s':>11} {'speedup':>8} {'inferred ok':>12}")
+    for label, template in LAYOUTS:
+        columns, fmt = parse_stream("\n".join(synth_lines(template, args.rows)))
+        stamp = pd.Series(columns["date"]) + " " + pd.Series(columns["time"])
+
+        with warnings.catch_warnings():
+            # the per-element dateutil fallback warns; that fallback is what we measure
+            warnings.simplefilter("ignore")
+            t_inferred, inferred = timed(lambda: pd.to_datetime(stamp, errors="coerce"))
+        t_explicit, parsed = timed(lambda: parse_datetimes(columns["date"], columns["time"], fmt))
+
+        assert len(parsed) == args.rows, f"{label}: {args.rows - len(parsed)} lines not recognized as messages"
+        assert parsed.notna().all(), f"{label}: explicit format left unparsed rows"
+        print(f"{label:<22} {fmt.datetime_format:<24} {t_inferred:>11.3f} {t_explicit:>11.3f} "
+              f"{t_inferred / t_explicit:>7.1f}x {(inferred == parsed).mean():>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
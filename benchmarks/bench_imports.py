@@ -0,0 +1,89 @@
+# benchmarks/bench_imports.py — COLD-START IMPORT-TIME BUDGET CHECK
+#
+# Usage:
+#   python benchmarks/bench_imports.py            # check every budget
+#   python benchmarks/bench_imports.py --scale 2  # slower machine / CI runner
+#
+# Each module is imported in a fresh interpreter (best of --runs), timing the
+# import alone, not interpreter start-up. A module fails its check when it
+# is over budget or pulls in a heavy dependency that should only load when
+# its feature is first used. Exits non-zero on any failure, so the check
+# can gate CI.
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budgets in ms: ~2.5x what was measured on one core, where
+# pandas alone is ~0.15 s of helper / chat_store / summarizer
+BUDGETS_MS = {
+    "helper": 400,
+    "chat_store": 400,
+    "batch": 50,
+    "summarizer": 350,
+    "pdf_report": 25,
+}
+
+# Loaded on first use of their feature, never by a plain import
+LAZY_MODULES = (
+    "nltk", "textblob", "urlextract", "emoji", "wordcloud", "matplotlib",
+    "seaborn", "fpdf", "fontTools", "PIL", "streamlit",
+)
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"ms": seconds * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs=3):
+    """
+    (best import time in ms, heavy modules it loaded) over `runs` fresh
+    interpreters.
+    """
+    best, loaded = None, []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result["ms"] < best:
+            best = result["ms"]
+        loaded = result["loaded"]
+    return best, loaded
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check module import times against their budgets")
+    ap.add_argument("--modules", default=",".join(BUDGETS_MS))
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--scale", type=float, default=float(os.environ.get("CHAT_IMPORT_BUDGET_SCALE", "1")),
+                    help="multiply every budget (slow machines)")
+    args = ap.parse_args()
+
+    failed = 0
+    print(f"{'module':<12} {'ms':>8} {'budget':>8}  status")
+    for module in args.modules.split(","):
+        ms, loaded = measure(module, args.runs)
+        budget = BUDGETS_MS[module] * args.scale
+        problems = []
+        if ms > budget:
+            problems.append("over budget")
+        if loaded:
+            problems.append("eager imports: " + ", ".join(loaded))
+        failed += bool(problems)
+        print(f"{module:<12} {ms:>8.1f} {budget:>8.0f}  {'; '.join(problems) or 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_memory.py — MEMORY OF THE LEGACY vs COMPACT messages_df LAYOUT
+#
+# Usage: python benchmarks/bench_memory.py [--rows 1000000] [--users 60]
+
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from chat_parser import parse_stream, parse_datetimes
+from helper import frame_from_columns
+
+WORDS = ("ok haha yes no good morning see you tomorrow where are you this is really nice "
+         "kal milte hai yaar <Media omitted> https://example.com/x 😂 👍").split()
+
+
+def synth_export(rows, users, seed=0):
+    rnd = random.Random(seed)
+    names = [f"User {k}" for k in range(users)]
+    lines = []
+    for _ in range(rows):
+        h = rnd.randrange(24)
+        lines.append(
+            f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(2018, 2025)}, "
+            f"{h:02d}:{rnd.randrange(60):02d} - {rnd.choice(names)}: "
+            + " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 12)))
+        )
+    return "\n".join(lines)
+
+
+def legacy_frame(columns, fmt):
+    """
+    The layout before the compact one: raw date / time strings, object
+    strings everywhere, Python date objects, int32 year / hour.
+    """
+    df = pd.DataFrame({name: pd.Series(values, dtype=object) for name, values in columns.items()})
+    df["datetime"] = parse_datetimes(df["date"], df["time"], fmt)
+    df["only_date"] = df["datetime"].dt.date
+    df["month"] = df["datetime"].dt.month_name().astype(object)
+    df["day_name"] = df["datetime"].dt.day_name().astype(object)
+    df["year"] = df["datetime"].dt.year
+    df["hour"] = df["datetime"].dt.hour
+    df["sentiment"] = 0.0
+    return df
+
+
+def legacy_records(df):
+    # the to_dict(orient="records") timelines the report used to keep
+    return [
+        df.groupby([df["year"], df["month"]]).size().reset_index(name="count").to_dict(orient="records"),
+        df.groupby("only_date").size().reset_index(name="count").to_dict(orient="records"),
+        df["day_name"].value_counts().reset_index().to_dict(orient="records"),
+        df["month"].value_counts().reset_index().to_dict(orient="records"),
+        df["user"].value_counts().reset_index().to_dict(orient="records"),
+        df[["datetime", "sentiment"]].dropna().to_dict(orient="records"),
+    ]
+
+
+def records_nbytes(records):
+    size = sys.getsizeof(records)
+    for row in records:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+    return size
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Legacy vs compact messages_df memory")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--users", type=int, default=60)
+    args = ap.parse_args()
+
+    columns, fmt = parse_stream(synth_export(args.rows, args.users))
+
+    legacy = legacy_frame(columns, fmt)
+    legacy_total = frame_nbytes(legacy) + sum(map(records_nbytes, legacy_records(legacy)))
+
+    compact = frame_from_columns(columns, fmt)
+    compact["sentiment"] = np.zeros(len(compact))
+    compact_total = frame_nbytes(compact)
+
+    mb = 1024 * 1024
+    print(f"messages: {len(compact):,}  users: {args.users}")
+    print(f"{'legacy frame':<28} {frame_nbytes(legacy) / mb:>10.1f} MB")
+    print(f"{'legacy frame + records':<28} {legacy_total / mb:>10.1f} MB")
+    print(f"{'compact frame':<28} {compact_total / mb:>10.1f} MB")
+    print(f"{'saved':<28} {(legacy_total - compact_total) / mb:>10.1f} MB "
+          f"({1 - compact_total / legacy_total:.0%})")
+
+
+if __name__ == "__main__":
+    main()
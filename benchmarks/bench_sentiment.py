@@ -0,0 +1,57 @@
+# benchmarks/bench_sentiment.py — VECTORIZED SENTIMENT vs TEXTBLOB: AGREEMENT AND SPEED
+#
+# Usage: python benchmarks/bench_sentiment.py [--messages 20000]
+#
+# Scores synthetic chat messages with both, prints the share within
+# POLARITY_TOLERANCE and the speedup, and fails if a fixed phrase of a known
+# rule path (intensifiers, negations, "!", emoticons) disagrees with TextBlob.
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from textblob import TextBlob
+from synth_export import body
+from sentiment import POLARITY_TOLERANCE, polarity_scores
+
+# One or more per rule path; each must agree with TextBlob
+PHRASES = [
+    "good", "very good", "not good", "not a good day", "never really happy",
+    "This is not very good", "not very happy today", "no very good", "not very good!",
+    "not very very good", "really not very good", "not extremely bad",
+    "not good at all, very bad", "great!!", "so happy :)", "bad :(",
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Vectorized sentiment vs TextBlob")
+    ap.add_argument("--messages", type=int, default=20_000)
+    args = ap.parse_args()
+
+    expected = [TextBlob(phrase).sentiment.polarity for phrase in PHRASES]
+    for phrase, want, got in zip(PHRASES, expected, polarity_scores(PHRASES)):
+        assert abs(want - got) <= POLARITY_TOLERANCE, f"{phrase!r}: TextBlob {want:.3f}, vectorized {got:.3f}"
+
+    rnd = random.Random(0)
+    messages = [" ".join(body(rnd, n)) for n in range(args.messages)]
+    t_textblob, reference = timed(lambda: np.array([TextBlob(m).sentiment.polarity for m in messages]))
+    t_vector, scores = timed(lambda: polarity_scores(messages))
+
+    agree = (np.abs(reference - scores) <= POLARITY_TOLERANCE).mean()
+    print(f"{len(PHRASES)} phrases agree; {args.messages:,} messages: {agree:.2%} within ±{POLARITY_TOLERANCE}, "
+          f"TextBlob {t_textblob:.2f} s, vectorized {t_vector:.2f} s ({t_textblob / t_vector:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_sketch.py — SKETCH MODE: PEAK MEMORY AND ERROR vs THE EXACT REPORT
+#
+# Usage: python benchmarks/bench_sketch.py [--lines 10k,100k,1M] [--exact-max 100k]
+#
+# For synthetic exports of growing size, prints the sketch's peak traced
+# memory (flat in the chat's length), the exact analysis' peak (up to
+# --exact-max lines), and how far the sketch's top-word / top-emoji / user
+# estimates are from the exact counts next to the bound they guarantee.
+# First checks that a month-first export whose first batch reads both ways
+# (every day <= 12) is dated like the full parse.
+
+import os
+import sys
+import time
+import pathlib
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synth_export import write_export, parse_size
+from sketches import sketch_chat
+from helper import analyze_text
+
+
+def traced(fn):
+    # (result, seconds, peak traced MB)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def max_error(estimates, exact):
+    # largest |estimate - exact| over the sketch's top items
+    return max((abs(est - exact.get(item, 0)) for item, est in estimates), default=0)
+
+
+def check_ambiguous_first_batch(tmp):
+    # 100k messages over 40 days: the first 20k-message batch only has
+    # days 1-8, so it cannot tell M/D from D/M; a later one settles it
+    path = pathlib.Path(tmp, "ambiguous.txt")
+    write_export(path, 100_000, "ios-12h", 20, 0, 40)
+    sketch, report = sketch_chat(path), analyze_text(path)
+
+    overview = report["overview"]
+    assert report["messages_df"]["datetime"].notna().all()
+    assert (str(sketch.first), str(sketch.last)) == (overview["first_message"], overview["last_message"]), \
+        f"sketch dates {sketch.first} .. {sketch.last}, full parse {overview['first_message']} .. " \
+        f"{overview['last_message']}"
+    daily = report["daily_timeline"]
+    assert sketch.timeline.daily().to_numpy().tolist() == daily["count"].tolist()
+    assert (sketch.timeline.heatmap().to_numpy() == report["rollup"].heatmap().to_numpy()).all()
+    print(f"ambiguous first batch: dated like the full parse ({sketch.first} .. {sketch.last})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sketch mode memory and accuracy")
+    ap.add_argument("--lines", default="10k,100k,1M", help="comma-separated export sizes")
+    ap.add_argument("--exact-max", default="100k", help="largest size also analyzed exactly")
+    args = ap.parse_args()
+    exact_max = parse_size(args.exact_max)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_ambiguous_first_batch(tmp)
+        print(f"{'lines':>10} {'sketch s':>9} {'sketch MB':>10} {'exact s':>8} {'exact MB':>9}  top-word err / bound, "
+              f"emoji err / bound, users est / exact")
+        for size in [parse_size(s) for s in args.lines.split(",")]:
+            path = pathlib.Path(tmp, f"chat_{size}.txt")
+            write_export(path, size)
+            sketch, sketch_s, sketch_mb = traced(lambda: sketch_chat(path))
+            line = f"{size:>10,} {sketch_s:>9.2f} {sketch_mb:>10.1f}"
+
+            if size <= exact_max:
+                report, exact_s, exact_mb = traced(lambda: analyze_text(path))
+                words = dict(report["most_common_words"])
+                emoji = dict(report["emoji_analysis"])
+                users = report["messages_df"]["user"].nunique()
+                line += (
+                    f" {exact_s:>8.2f} {exact_mb:>9.1f}"
+                    f"  {max_error(sketch.top_words.most_common(25), words)} / {sketch.top_words.error:.0f}"
+                    f", {max_error(sketch.top_emoji.most_common(25), emoji)} / {sketch.top_emoji.error:.0f}"
+                    f", {sketch.users.count()} / {users}"
+                )
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# benchmarks/bench_suite.py — PER-STAGE BENCHMARK SUITE ON SYNTHETIC EXPORTS
+#
+# Usage:
+#   python benchmarks/bench_suite.py --sizes 10k,100k,1M -o results.json
+#   python benchmarks/bench_suite.py --sizes 10k --compare results.json
+#
+# Every stage is timed on its own (wall time, rows, rows/s); peak memory is
+# measured with tracemalloc in a second, untimed run of the same stage so
+# tracing overhead never leaks into the timings. tracemalloc only sees
+# Python / NumPy allocations; "rss_mb" (process high-water mark) covers
+# Arrow buffers as well. Results are written as JSON for run-to-run diffs.
+
+import os
+import sys
+import json
+import time
+import pathlib
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+import pandas as pd
+from synth_export import LAYOUTS, parse_size, write_export
+from chat_parser import FORMAT_SAMPLE_LINES, COLUMNS, iter_lines, detect_format, iter_messages, parse_datetimes
+from helper import frame_from_columns, build_report, summarize_messages, export_report_pdf
+from sentiment import polarity_scores
+from features import extract_emojis, link_counts
+from user_index import OVERALL, build_user_index, user_word_counts
+from rollup import build_rollup
+from wordclouds import render_wordcloud
+
+STAGES = (
+    "preprocess", "parse", "datetime", "frame", "sentiment", "emoji", "url",
+    "words", "user_index", "wordcloud", "summarize", "pdf", "heatmap",
+)
+
+
+# --------------------------------------------------------
+#                STAGES
+# --------------------------------------------------------
+# Each stage takes the shared state dict and returns (rows processed, state
+# updates). Later stages read what earlier ones produced.
+def stage_preprocess(state):
+    # a str would be taken as export text, not as a path
+    lines = list(iter_lines(pathlib.Path(state["path"])))
+    return len(lines), {"lines": lines}
+
+
+def stage_parse(state):
+    lines = state["lines"]
+    fmt = detect_format(lines[:FORMAT_SAMPLE_LINES])
+    columns = {name: [] for name in COLUMNS}
+    appenders = [columns[name].append for name in COLUMNS]
+    for message in iter_messages(lines, fmt.pattern):
+        for append, value in zip(appenders, message):
+            append(value)
+    return len(lines), {"fmt": fmt, "columns": columns}
+
+
+def stage_datetime(state):
+    columns = state["columns"]
+    parse_datetimes(columns["date"], columns["time"], state["fmt"])
+    return len(columns["date"]), {}
+
+
+def stage_frame(state):
+    df = frame_from_columns(state["columns"], state["fmt"])
+    return len(df), {"df": df}
+
+
+def stage_sentiment(state):
+    df = state["df"]
+    return len(df), {"sentiment": polarity_scores(df["message"])}
+
+
+def stage_emoji(state):
+    df = state["df"]
+    return len(df), {"emojis": extract_emojis(df["message"])}
+
+
+def stage_url(state):
+    df = state["df"]
+    return len(df), {"links": link_counts(df["message"])}
+
+
+def stage_words(state):
+    df = state["df"]
+    return len(df), {"word_counts": user_word_counts(df)}
+
+
+def stage_user_index(state):
+    df = state["df"].assign(emojis=state["emojis"], links=state["links"], sentiment=state["sentiment"])
+    return len(df), {"full_df": df, "index": build_user_index(df, words=state["word_counts"])}
+
+
+def stage_wordcloud(state):
+    # the report's word_counts metric, as the word cloud metric reads it
+    counts = state["word_counts"][OVERALL]
+    render_wordcloud(counts)   # no chat key: always rendered, never cached
+    return sum(counts.values()), {}
+
+
+def stage_summarize(state):
+    df = state["df"]
+    summarize_messages(df["message"], max_sentences=4)
+    return len(df), {}
+
+
+def stage_pdf(state):
+    report = build_report(state["full_df"])
+    return len(state["df"]), {"pdf_bytes": len(export_report_pdf(report))}
+
+
+def stage_heatmap(state):
+    # rollup cube build + the 7 x 24 reduction, as the Heatmap page does
+    heat = build_rollup(state["df"]).heatmap()
+    return int(heat.to_numpy().sum()), {}
+
+
+STAGE_FUNCS = {name: globals()["stage_" + name] for name in STAGES}
+
+# Stages whose output a stage reads; run untimed when not selected themselves
+STAGE_NEEDS = {
+    "parse": ("preprocess",),
+    "datetime": ("parse",),
+    "frame": ("parse",),
+    "sentiment": ("frame",),
+    "emoji": ("frame",),
+    "url": ("frame",),
+    "words": ("frame",),
+    "user_index": ("sentiment", "emoji", "url", "words"),
+    "wordcloud": ("words",),
+    "summarize": ("frame",),
+    "pdf": ("user_index",),
+    "heatmap": ("frame",),
+}
+
+
+def required_stages(stages):
+    needed, todo = set(), list(stages)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(STAGE_NEEDS.get(name, ()))
+    return needed
+
+
+# --------------------------------------------------------
+#                RUNNER
+# --------------------------------------------------------
+def rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_stage(name, state, memory=True):
+    fn = STAGE_FUNCS[name]
+    result = {"stage": name}
+    try:
+        start = time.perf_counter()
+        rows, updates = fn(state)
+        seconds = time.perf_counter() - start
+    except Exception as exc:
+        # one line, so a missing font / corpus does not flood the table
+        result["error"] = f"{type(exc).__name__}: " + " ".join(str(exc).replace("*", "").split())[:160]
+        return result
+
+    result.update(seconds=round(seconds, 4), rows=rows, rows_per_s=round(rows / seconds) if seconds else None)
+    state.update(updates)
+
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(state)
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    result["rss_mb"] = rss_mb()
+    return result
+
+
+def run_case(path, stages, memory=True):
+    state = {"path": path}
+    results = []
+    needed = required_stages(stages)
+    for name in STAGES:
+        if name in stages:
+            results.append(run_stage(name, state, memory))
+        elif name in needed:
+            state.update(STAGE_FUNCS[name](state)[1])
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {(r["size"], r["layout"], r["stage"]): r for r in baseline["results"]}
+
+    print(f"\n{'size':<6} {'layout':<18} {'stage':<11} {'before s':>9} {'after s':>9} {'ratio':>7}")
+    for r in results:
+        before = old.get((r["size"], r["layout"], r["stage"]))
+        if not before or "seconds" not in before or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+        print(f"{r['size']:<6} {r['layout']:<18} {r['stage']:<11} "
+              f"{before['seconds']:>9.3f} {r['seconds']:>9.3f} {ratio:>6.2f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-stage benchmarks on synthetic exports")
+    ap.add_argument("--sizes", default="10k,100k", help="comma-separated line counts (10k, 100k, 1M, 10M or numbers)")
+    ap.add_argument("--layouts", default=",".join(LAYOUTS), help="comma-separated export layouts")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--skip", default="", help="comma-separated stages to leave out")
+    ap.add_argument("--users", type=int, default=80)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    ap.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "chat-bench"),
+                    help="where generated exports are kept between runs")
+    ap.add_argument("-o", "--output", default="bench_results.json")
+    ap.add_argument("--compare", help="earlier results file to compare timings with")
+    args = ap.parse_args()
+
+    skip = set(filter(None, args.skip.split(",")))
+    stages = [s for s in args.stages.split(",") if s and s not in skip]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error("unknown stages: " + ", ".join(sorted(unknown)))
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    print(f"{'size':<6} {'layout':<18} {'stage':<11} {'seconds':>9} {'rows/s':>12} {'peak MB':>8}")
+    for size in args.sizes.split(","):
+        lines = parse_size(size)
+        for layout in args.layouts.split(","):
+            path = os.path.join(args.workdir, f"synth-{layout}-{lines}-{args.users}.txt")
+            if not os.path.exists(path):
+                write_export(path, lines, layout, args.users)
+
+            for r in run_case(path, stages, memory=not args.no_memory):
+                r.update(size=size, lines=lines, layout=layout)
+                results.append(r)
+                if "error" in r:
+                    print(f"{size:<6} {layout:<18} {r['stage']:<11} error: {r['error']}")
+                else:
+                    print(f"{size:<6} {layout:<18} {r['stage']:<11} {r['seconds']:>9.3f} "
+                          f"{r['rows_per_s'] or 0:>12,} {r.get('peak_mb', '-'):>8}")
+
+    out = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "users": args.users,
+            "memory": not args.no_memory,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=1)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
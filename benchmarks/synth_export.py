@@ -0,0 +1,145 @@
+# benchmarks/synth_export.py — SYNTHETIC WHATSAPP EXPORT GENERATOR
+#
+# Usage: python benchmarks/synth_export.py --lines 1000000 --layout ios-24h -o chat.txt
+#
+# Exports are streamed to disk line by line, so 10M-line files need no more
+# memory than 10k-line ones. Output is deterministic for a given seed.
+
+import os
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+
+# Header layouts of every export format the parser detects
+LAYOUTS = {
+    "android-12h": "{M}/{D}/{yy}, {h12}:{mi:02d} {ampm} - {user}: ",
+    "android-24h": "{d:02d}/{m:02d}/{yyyy}, {h:02d}:{mi:02d} - {user}: ",
+    "android-24h-dots": "{d:02d}.{m:02d}.{yy}, {h:02d}:{mi:02d} - {user}: ",
+    "android-iso": "{yyyy}-{m:02d}-{d:02d}, {h:02d}:{mi:02d} - {user}: ",
+    "ios-24h": "[{d:02d}/{m:02d}/{yy}, {h:02d}:{mi:02d}:{s:02d}] {user}: ",
+    "ios-12h": "[{M}/{D}/{yy}, {h12}:{mi:02d}:{s:02d} {ampm}] {user}: ",
+}
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+WORDS = (
+    "ok okay haha yes no good bad great morning night see you tomorrow where are "
+    "this that is was really very not so happy sad love thanks please call me now later "
+    "kal milte hai yaar kya scene bhai chalo theek meeting office lunch dinner trip photo"
+).split()
+EMOJI = ["😂", "👍", "👍🏽", "❤️", "🙏", "🔥", "😭", "🎉", "👨‍👩‍👧", "🇮🇳", "1️⃣", "😊"]
+URLS = ["https://example.com/a?id={n}", "www.google.com", "http://news.site.org/{n}", "youtu.be/x{n}"]
+SYSTEM_LINES = ["<Media omitted>", "This message was deleted", "<Media omitted>"]
+# iOS puts a left-to-right mark before the whole line and before the placeholder
+IOS_SYSTEM_LINES = ["image omitted", "video omitted", "sticker omitted", "This message was deleted."]
+LRM = "\u200e"
+
+# Share of messages of each kind (the rest are plain text)
+P_MEDIA = 0.08
+P_URL = 0.05
+P_EMOJI = 0.25
+P_MULTILINE = 0.04
+
+
+def participants(count, rnd):
+    names = []
+    for k in range(count):
+        if k % 7 == 3:
+            # unsaved contacts show up as phone numbers
+            names.append(f"+91 9{rnd.randrange(10**8, 10**9)}")
+        else:
+            names.append(f"Member {k} {rnd.choice(['Sharma', 'Patel', 'Khan', 'Iyer', 'Das'])}")
+    return names
+
+
+def header(layout, stamp, user):
+    h = stamp.hour
+    return LAYOUTS[layout].format(
+        d=stamp.day, m=stamp.month, D=stamp.day, M=stamp.month,
+        yy=f"{stamp.year % 100:02d}", yyyy=stamp.year,
+        h=h, h12=(h % 12) or 12, ampm="AM" if h < 12 else "PM",
+        mi=stamp.minute, s=stamp.second, user=user,
+    )
+
+
+def body(rnd, n, ios=False):
+    """
+    One message: a list of lines (more than one for multi-line messages).
+    """
+    if rnd.random() < P_MEDIA:
+        return [rnd.choice(IOS_SYSTEM_LINES if ios else SYSTEM_LINES)]
+
+    text = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 14)))
+    if rnd.random() < P_URL:
+        text += " " + rnd.choice(URLS).format(n=n)
+    if rnd.random() < P_EMOJI:
+        text += " " + "".join(rnd.choice(EMOJI) for _ in range(rnd.randint(1, 3)))
+    if rnd.random() < P_MULTILINE:
+        extra = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 8))) for _ in range(rnd.randint(1, 4))]
+        return [text] + extra
+    return [text]
+
+
+def iter_export_lines(lines, layout="android-24h", users=80, seed=0, days=730, start=datetime(2021, 1, 1)):
+    """
+    Yield `lines` export lines (continuation lines count) in `layout`,
+    spread over `days` days.
+    """
+    rnd = random.Random(seed)
+    mean_gap = days * 86400 / max(lines, 1)
+    names = participants(users, rnd)
+    # a few people write most of the messages, like real groups
+    weights = [1.0 / (k + 1) for k in range(users)]
+    ios = layout.startswith("ios")
+    stamp = start
+    emitted = n = 0
+    while emitted < lines:
+        stamp += timedelta(seconds=rnd.uniform(0, 2 * mean_gap))
+        user = rnd.choices(names, weights)[0]
+        parts = body(rnd, n, ios)
+        n += 1
+        if ios and parts[0] in IOS_SYSTEM_LINES:
+            yield LRM + header(layout, stamp, user) + LRM + parts[0]
+        else:
+            yield header(layout, stamp, user) + parts[0]
+        emitted += 1
+        for extra in parts[1:]:
+            if emitted >= lines:
+                return
+            yield extra
+            emitted += 1
+
+
+def write_export(path, lines, layout="android-24h", users=80, seed=0, days=730):
+    """
+    Write a synthetic export to `path`; returns its size in bytes.
+    """
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\ufeff")
+        for line in iter_export_lines(lines, layout, users, seed, days):
+            f.write(line)
+            f.write("\n")
+    return os.path.getsize(path)
+
+
+def parse_size(text):
+    return SIZES[text] if text in SIZES else int(text)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic WhatsApp export")
+    ap.add_argument("--lines", default="100k", help="line count or one of " + ", ".join(SIZES))
+    ap.add_argument("--layout", default="android-24h", choices=sorted(LAYOUTS))
+    ap.add_argument("--users", type=int, default=80)
+    ap.add_argument("--days", type=int, default=730, help="time span of the chat")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", required=True)
+    args = ap.parse_args()
+
+    size = write_export(args.output, parse_size(args.lines), args.layout, args.users, args.seed, args.days)
+    print(f"wrote {args.output} ({size / 1024 / 1024:.1f} MB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
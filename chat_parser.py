@@ -0,0 +1,333 @@
+# chat_parser.py — STREAMING WHATSAPP EXPORT PARSER
+
+import io
+import os
+import re
+import mmap
+import codecs
+from collections import Counter, namedtuple
+from itertools import chain, islice
+import pandas as pd
+from preprocessor import preprocess_line
+from chat_source import open_chat
+
+# Read size for files / uploads (1 MiB keeps peak memory flat on huge exports)
+CHUNK_SIZE = 1 << 20
+
+# Lines sampled from the top of the export to detect its format
+FORMAT_SAMPLE_LINES = 1000
+
+# Lines between parse_stream() progress callbacks
+PROGRESS_EVERY = 50_000
+
+# Messages per iter_batches() batch
+BATCH_MESSAGES = 100_000
+
+
+class ChatFormat(namedtuple("ChatFormat", "name pattern datetime_format alt_datetime_format")):
+    """
+    A detected export layout: one compiled header regex for the whole chat and
+    an explicit strftime format for its "date time" strings. The alternate
+    format swaps day/month and is only tried when the sample was ambiguous.
+    """
+
+
+# Pattern: 12/31/20, 11:59 PM - Name: message
+DEFAULT_FORMAT = ChatFormat(
+    "android-12h",
+    re.compile(r'^(\d{1,2}/\d{1,2}/\d{2,4}),\s*(\d{1,2}:\d{2}\s*[APMapm]{2})\s*-\s*([^:]+):\s*(.*)$'),
+    "%m/%d/%y %I:%M %p",
+    "%d/%m/%y %I:%M %p",
+)
+LINE_PATTERN = DEFAULT_FORMAT.pattern
+
+# Header layouts; {date} / {time} are filled with loose sub-patterns for
+# detection and with tightened ones (exact separators) for parsing
+LAYOUTS = {
+    # Android: 31/12/20, 23:59 - Name: message
+    "android": r'^({date}),?\s*({time})\s*-\s*([^:]+):\s*(.*)$',
+    # iOS: [31/12/20, 23:59:59] Name: message
+    "ios": r'^\[({date}),?\s*({time})\]\s*([^:]+):\s*(.*)$',
+}
+_LOOSE_DATE = r'\d{1,4}[./-]\d{1,2}[./-]\d{1,4}'
+_LOOSE_TIME = r'\d{1,2}[:.]\d{2}(?:[:.]\d{2})?(?:\s*[APap][Mm])?'
+_LOOSE_PATTERNS = {
+    name: re.compile(layout.format(date=_LOOSE_DATE, time=_LOOSE_TIME))
+    for name, layout in LAYOUTS.items()
+}
+_DATE_PARTS = re.compile(r'(\d+)([./-])(\d+)[./-](\d+)')
+
+COLUMNS = ("date", "time", "user", "message")
+
+
+# --------------------------------------------------------
+#                CHUNKED INPUT
+# --------------------------------------------------------
+def iter_chunks(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Yield decoded text chunks from a str, bytes, path or file-like object.
+    Bytes are decoded incrementally so multi-byte characters split across
+    chunk boundaries are handled correctly. Bytes-like sources (incl. a
+    memory-mapped file) are decoded slice by slice, without a copy; a path
+    is memory-mapped, or its chat member streamed if it is a .zip.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    elif isinstance(source, os.PathLike):
+        with open_chat(source) as chat:
+            yield from iter_chunks(chat, chunk_size, encoding)
+        return
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        with memoryview(source) as view:
+            for start in range(0, len(view), chunk_size):
+                text = decoder.decode(view[start:start + chunk_size])
+                if text:
+                    yield text
+    else:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                yield chunk
+            else:
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Yield cleaned lines one at a time without materializing the whole export.
+    """
+    pending = ""
+    for chunk in iter_chunks(source, chunk_size, encoding):
+        pieces = (pending + chunk).splitlines(True)
+        # the last piece may be cut mid-line (or mid "\r\n"), carry it over
+        pending = pieces.pop() if pieces else ""
+        for piece in pieces:
+            yield preprocess_line(piece)
+
+    if pending:
+        yield preprocess_line(pending)
+
+
+# --------------------------------------------------------
+#                FORMAT DETECTION
+# --------------------------------------------------------
+def detect_format(sample_lines):
+    """
+    Pick the export layout (Android / iOS, 12h / 24h, date order and
+    separators) from a sample of lines. Falls back to DEFAULT_FORMAT.
+    """
+    best_name, best_hits = None, []
+    for name, loose in _LOOSE_PATTERNS.items():
+        hits = [m.group(1, 2) for m in map(loose.match, sample_lines) if m]
+        if len(hits) > len(best_hits):
+            best_name, best_hits = name, hits
+
+    if not best_hits:
+        return DEFAULT_FORMAT
+
+    # ---- date: separator, component order, year width ----
+    parts = [_DATE_PARTS.match(d).groups() for d, _ in best_hits]
+    sep = Counter(p[1] for p in parts).most_common(1)[0][0]
+    firsts, seconds, lasts = zip(*((p[0], p[2], p[3]) for p in parts))
+
+    if max(map(len, firsts)) == 4:
+        order = ("%Y", "%m", "%d")
+    elif any(int(x) > 12 for x in firsts):
+        order = ("%d", "%m", "%y")
+    elif any(int(x) > 12 for x in seconds):
+        order = ("%m", "%d", "%y")
+    else:
+        order = None   # ambiguous sample: decided by clock style below
+
+    # ---- time: 12h / 24h, seconds, separator ----
+    times = [t for _, t in best_hits]
+    twelve_hour = sum(t[-1:] in "mM" for t in times) * 2 > len(times)
+    tsep = "." if sum("." in t for t in times) * 2 > len(times) else ":"
+    with_seconds = sum(t.count(tsep) == 2 for t in times) * 2 > len(times)
+    ampm_space = sum(bool(re.search(r'\s[APap][Mm]$', t)) for t in times) * 2 > len(times)
+
+    if order is None:
+        # US Android exports are the 12h month-first ones; everyone else is day-first
+        order = ("%m", "%d", "%y") if twelve_hour and best_name == "android" else ("%d", "%m", "%y")
+    if order[0] != "%Y":
+        year = "%Y" if Counter(map(len, lasts)).most_common(1)[0][0] == 4 else "%y"
+        order = order[:2] + (year,)
+
+    date_fmt = sep.join(order)
+    alt_fmt = sep.join((order[1], order[0], order[2])) if order[0] != "%Y" else None
+    time_fmt = tsep.join(("%I" if twelve_hour else "%H", "%M") + (("%S",) if with_seconds else ()))
+    if twelve_hour:
+        time_fmt += " %p" if ampm_space else "%p"
+
+    esc = re.escape(sep)
+    if order[0] == "%Y":
+        date_re = r'\d{4}' + esc + r'\d{1,2}' + esc + r'\d{1,2}'
+    else:
+        date_re = r'\d{1,2}' + esc + r'\d{1,2}' + esc + (r'\d{4}' if order[2] == "%Y" else r'\d{2}')
+    time_re = r'\d{1,2}' + re.escape(tsep) + r'\d{2}' + ((re.escape(tsep) + r'\d{2}') if with_seconds else "")
+    if twelve_hour:
+        time_re += r'\s*[APap][Mm]'
+
+    name = "{}-{}".format(best_name, "12h" if twelve_hour else "24h")
+    return ChatFormat(
+        name,
+        re.compile(LAYOUTS[best_name].format(date=date_re, time=time_re)),
+        date_fmt + " " + time_fmt,
+        alt_fmt + " " + time_fmt if alt_fmt else None,
+    )
+
+
+def parse_datetimes(dates, times, fmt):
+    """
+    Vectorized "date time" -> datetime64 with the detected explicit format.
+    If the format leaves values unparsed and the day/month-swapped format
+    parses more of them, the swapped one wins.
+    """
+    stamp = pd.Series(dates, dtype=object) + " " + pd.Series(times, dtype=object)
+    parsed = pd.to_datetime(stamp, format=fmt.datetime_format, errors="coerce")
+
+    if fmt.alt_datetime_format and parsed.isna().any():
+        alt = pd.to_datetime(stamp, format=fmt.alt_datetime_format, errors="coerce")
+        if alt.isna().sum() < parsed.isna().sum():
+            return alt
+    return parsed
+
+
+def parse_datetimes_settled(dates, times, fmt):
+    """
+    parse_datetimes() for one batch of a chat, also returning `fmt` with
+    the day/month order made final (no alternate) once the batch tells the
+    two orders apart, so later batches are parsed the same way. If both
+    orders parse the batch equally well (every day <= 12), `fmt` comes back
+    unchanged and the stamps use the detected order.
+    """
+    stamp = pd.Series(dates, dtype=object) + " " + pd.Series(times, dtype=object)
+    parsed = pd.to_datetime(stamp, format=fmt.datetime_format, errors="coerce")
+    if not fmt.alt_datetime_format:
+        return parsed, fmt
+
+    alt = pd.to_datetime(stamp, format=fmt.alt_datetime_format, errors="coerce")
+    missing, alt_missing = parsed.isna().sum(), alt.isna().sum()
+    if alt_missing < missing:
+        return alt, fmt._replace(datetime_format=fmt.alt_datetime_format, alt_datetime_format=None)
+    if missing < alt_missing:
+        return parsed, fmt._replace(alt_datetime_format=None)
+    return parsed, fmt
+
+
+def settle_format(dates, fmt):
+    """
+    `fmt` with its day/month order made final (no alternate) if the
+    distinct `dates` tell the two orders apart, else `fmt` unchanged. The
+    order wins that reads more of them, as in parse_datetimes().
+    """
+    if not fmt.alt_datetime_format:
+        return fmt
+    days = pd.Series(pd.unique(pd.Series(dates, dtype=object)), dtype=object)
+    # the date part of both formats (the time part is the same)
+    missing = pd.to_datetime(days, format=fmt.datetime_format.split(" ")[0], errors="coerce").isna().sum()
+    alt_missing = pd.to_datetime(days, format=fmt.alt_datetime_format.split(" ")[0], errors="coerce").isna().sum()
+    if alt_missing < missing:
+        return fmt._replace(datetime_format=fmt.alt_datetime_format, alt_datetime_format=None)
+    if missing < alt_missing:
+        return fmt._replace(alt_datetime_format=None)
+    return fmt
+
+
+# --------------------------------------------------------
+#                STREAMING PARSER
+# --------------------------------------------------------
+def iter_messages(lines, pattern=LINE_PATTERN):
+    """
+    Group lines into (date, time, user, message) tuples.
+    Continuation lines are collected in a list and joined once per message.
+    """
+    match_line = pattern.match
+    current = None
+    parts = []
+
+    for line in lines:
+        match = match_line(line)
+        if match:
+            if current is not None:
+                yield current + (" ".join(parts),)
+            date_str, time_str, user, msg = match.groups()
+            current = (date_str, time_str, user.strip())
+            parts = [msg]
+        elif current is not None:
+            # continuation of previous message
+            parts.append(line)
+
+    if current is not None:
+        # trailing blank lines belong to the end of the file, not the message
+        while len(parts) > 1 and not parts[-1]:
+            parts.pop()
+        yield current + (" ".join(parts),)
+
+
+def _reporting(lines, progress, every=PROGRESS_EVERY):
+    count = 0
+    for count, line in enumerate(lines, 1):
+        if count % every == 0:
+            progress(count)
+        yield line
+    progress(count)
+
+
+def _message_stream(source, chunk_size, encoding, fmt, progress):
+    # (message tuples, ChatFormat), detecting the format from a sample
+    lines = iter_lines(source, chunk_size, encoding)
+    if progress is not None:
+        lines = _reporting(lines, progress)
+    if fmt is None:
+        sample = list(islice(lines, FORMAT_SAMPLE_LINES))
+        fmt = detect_format(sample)
+        lines = chain(sample, lines)
+    return iter_messages(lines, fmt.pattern), fmt
+
+
+def _columns(messages):
+    columns = {name: [] for name in COLUMNS}
+    appenders = [columns[name].append for name in COLUMNS]
+
+    for message in messages:
+        for append, value in zip(appenders, message):
+            append(value)
+    return columns
+
+
+def parse_stream(source, chunk_size=CHUNK_SIZE, encoding="utf-8", fmt=None, progress=None):
+    """
+    Parse a WhatsApp export into column buffers.
+    The format is detected from the first FORMAT_SAMPLE_LINES lines unless
+    given. Returns (columns, fmt): a dict of lists keyed by COLUMNS, ready
+    for pd.DataFrame(), and the ChatFormat used.
+    `progress(lines)` is called every PROGRESS_EVERY lines and at the end;
+    an exception it raises (e.g. a cancelled job) aborts the parse.
+    """
+    messages, fmt = _message_stream(source, chunk_size, encoding, fmt, progress)
+    return _columns(messages), fmt
+
+
+def iter_batches(source, batch_size=BATCH_MESSAGES, chunk_size=CHUNK_SIZE, encoding="utf-8", fmt=None,
+                 progress=None):
+    """
+    parse_stream() in pieces: yields (columns, fmt) for every `batch_size`
+    messages, so a caller can fold a chat of any size in bounded memory.
+    """
+    messages, fmt = _message_stream(source, chunk_size, encoding, fmt, progress)
+    while True:
+        columns = _columns(islice(messages, batch_size))
+        if not columns["message"]:
+            return
+        yield columns, fmt
@@ -0,0 +1,226 @@
+# chat_session.py — SHARED UPLOAD + CACHED REPORT FOR ALL STREAMLIT PAGES
+
+import os
+import streamlit as st
+from chat_store import analyze_stored, is_stored
+from report_cache import REPORT_CACHE, content_hash
+from chat_source import ExportError
+from instrument import PROFILE_MODES, profiled, summarize_timings, counters
+from jobs import start_job
+
+# How often a page polls a running background analysis
+JOB_POLL_SECONDS = float(os.environ.get("CHAT_JOB_POLL_SECONDS", "0.5"))
+
+# Metrics most pages need; touched inside a profiled run so the dump covers them
+PROFILED_METRICS = ("links", "emojis", "sentiment", "user_index", "overview")
+
+
+def load_report(label, info, spinner="Analyzing chat...", preview=None):
+    """
+    Show the chat uploader and return the analysis report.
+    The report is looked up by content hash, so the same chat is parsed once
+    and then reused by every page; a page opened without a new upload falls
+    back to the chat uploaded last in this session.
+    A new chat is analyzed by a background job (see jobs.py): the page gets
+    the report as soon as the messages are parsed, with metrics still being
+    computed (see metric_ready), and reruns as results come in. Uploading
+    a different chat cancels the running job.
+    A large new chat is first sampled (see preview.py): until it is parsed,
+    `preview(p)` is called to draw the page's views from the Preview `p`,
+    labelled as estimates; the exact views replace them on the next rerun.
+    Stops the script run if no chat is available (yet) or the export is invalid.
+    """
+    # a .zip export is read from its chat member (media is skipped)
+    uploaded = st.file_uploader(label, type=["txt", "zip"])
+
+    if uploaded:
+        try:
+            key = upload_key(uploaded)
+        except ExportError as exc:
+            st.error(str(exc))
+            st.stop()
+        job = st.session_state.get("analysis_job")
+        if job is not None and job.key != key:
+            job.cancel()
+            del st.session_state["analysis_job"]
+        st.session_state["chat_key"] = key
+        st.session_state["chat_name"] = uploaded.name
+
+    key = st.session_state.get("chat_key")
+    if key is None:
+        st.info(info)
+        st.stop()
+
+    profile_mode = st.session_state.pop("profile_next", None)
+    if profile_mode and uploaded:
+        with st.spinner(f"Analyzing chat under {profile_mode}..."):
+            report = REPORT_CACHE.put(key, _profiled_analysis(uploaded, key, profile_mode))
+    else:
+        report = REPORT_CACHE.get(key)
+
+    if report is None:
+        report = _background_report(key, uploaded, info, spinner, preview)
+    else:
+        job = st.session_state.get("analysis_job")
+        if job is not None and job.done:
+            del st.session_state["analysis_job"]
+    if not uploaded:
+        st.caption(f"Using previously uploaded chat: {st.session_state.get('chat_name', 'chat')}")
+
+    if "error" in report:
+        st.error(report["error"])
+        st.stop()
+
+    return report
+
+
+def upload_key(uploaded):
+    """
+    The content hash of an uploaded chat, computed once per upload: reruns
+    reuse the key saved under the upload's file_id instead of re-reading
+    (and, for a .zip, re-decompressing) the file.
+    """
+    keys = st.session_state.setdefault("upload_keys", {})
+    if uploaded.file_id not in keys:
+        keys[uploaded.file_id] = content_hash(uploaded)
+    return keys[uploaded.file_id]
+
+
+def _background_report(key, uploaded, info, spinner, draw_preview):
+    # the (partial) report of this session's job for `key`, starting it if needed
+    job = st.session_state.get("analysis_job")
+    if job is None or job.key != key:
+        if not uploaded:
+            # evicted from the cache and no upload on this page to rebuild it
+            st.session_state.pop("chat_key", None)
+            st.info(info)
+            st.stop()
+        # its own bytes: reruns re-hash (seek) the upload while the job reads
+        job = start_job(
+            key, uploaded.getvalue(),
+            on_done=lambda done: REPORT_CACHE.put(done.key, done.report),
+            preview=None if is_stored(key) else _sample_preview,
+        )
+        st.session_state["analysis_job"] = job
+
+    if job.done:
+        del st.session_state["analysis_job"]
+        if job.error:
+            return {"error": job.error}
+        if job.report is not None:
+            return job.report
+        st.stop()   # cancelled
+
+    job_progress(job, spinner)
+    if job.report is None:
+        show_preview(job, draw_preview)
+        st.stop()
+    return job.report
+
+
+def _sample_preview(source):
+    # sketches / features load only once a chat is analyzed
+    from preview import build_preview
+
+    return build_preview(source)
+
+
+def show_preview(job, draw):
+    """
+    Draw the job's Preview with the page's `draw(preview)`, labelled as an
+    estimate; nothing if there is none.
+    """
+    if draw is None or job is None or job.preview is None:
+        return
+    st.info(
+        f"Estimated from a {job.preview.fraction:.1%} sample of the chat; "
+        "exact numbers replace these when the analysis finishes."
+    )
+    draw(job.preview)
+
+
+def job_progress(job, label="Analyzing chat..."):
+    """
+    Progress bar of a running job; reruns the page whenever the job has
+    new results, so partial results fill in as they are computed.
+    """
+    shown = job.version
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        if job.version != shown:
+            st.rerun()
+        st.progress(job.fraction, text=f"{label} {job.status()}")
+
+    poll()
+
+
+def running_job(report):
+    """
+    This session's job still computing metrics of `report`, or None.
+    """
+    job = st.session_state.get("analysis_job")
+    if job is not None and not job.done and job.key == getattr(report, "key", None):
+        return job
+    return None
+
+
+def metric_ready(report, name, label=None, preview=None):
+    """
+    True when report[name] can be read without waiting on the background
+    job. With a `label`, a page that needs the metric instead shows a note
+    (and the job's preview, drawn by `preview`, see load_report) and
+    stops; it is rerun once the metric is computed.
+    """
+    job = running_job(report)
+    if report.peek(name) is not None or job is None:
+        return True
+    if label is None:
+        return False
+    st.info(f"{label} is still being computed; this page updates when it is ready.")
+    show_preview(job, preview)
+    st.stop()
+
+
+def _profiled_analysis(uploaded, key, mode):
+    # no store, no incremental reuse: a profiled run parses and scores from scratch
+    with profiled(mode, label="chat-analysis") as dump:
+        report = analyze_stored(uploaded, key, store_dir=None, incremental=False)
+        if "error" not in report:
+            for name in PROFILED_METRICS:
+                report[name]
+    st.session_state["profile_dump"] = dump["path"]
+    return report
+
+
+# --------------------------------------------------------
+#                PERFORMANCE PANEL
+# --------------------------------------------------------
+def performance_panel(report):
+    """
+    Optional sidebar panel: per-stage timings of the current chat and a
+    switch to profile one fresh analysis (cProfile or tracemalloc dump).
+    Call it at the end of a page so the stages that page ran are included.
+    """
+    with st.sidebar.expander("⚙ Performance"):
+        if st.checkbox("Show stage timings", key="show_timings"):
+            timings = report.get("timings") or []
+            if timings:
+                table = summarize_timings(timings)
+                st.dataframe(table, hide_index=True)
+                st.caption(f"Total: {table['seconds'].sum():.2f} s (nested stages are counted in their parent too)")
+                for name, value in counters(timings).items():
+                    st.caption(f"{name.replace('_', ' ').capitalize()}: {value}")
+            else:
+                st.caption("No stages recorded for this chat.")
+
+        mode = st.selectbox("Profiler", PROFILE_MODES, key="profile_mode")
+        if st.button("Profile a fresh analysis"):
+            st.session_state["profile_next"] = mode
+            st.rerun()
+        st.caption("Needs the chat uploaded on this page; re-parses it once under the profiler.")
+
+        path = st.session_state.get("profile_dump")
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                st.download_button("📥 Download profile", f.read(), file_name=os.path.basename(path))
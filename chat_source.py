@@ -0,0 +1,125 @@
+# chat_source.py — EXPORT SOURCES (.ZIP CHAT MEMBERS, MEMORY-MAPPED FILES)
+#
+# WhatsApp's "Export chat" produces a .zip holding _chat.txt (plus media
+# when exported with media). open_chat() turns any export source into the
+# chat text the parser, the content hash and the incremental store read:
+#   - a .zip (path, bytes or uploaded file, recognized by its magic bytes):
+#     the chat member, decompressed as it is read; media members are never
+#     read and nothing is extracted to disk;
+#   - a local path to a plain-text export: the file memory-mapped read-only,
+#     so it is hashed and decoded in place, never copied whole into memory;
+#   - anything else (str, bytes, file-like) is passed through unchanged.
+
+import io
+import os
+import mmap
+import zipfile
+from contextlib import contextmanager
+
+EXPORT_SUFFIXES = (".txt", ".zip")
+
+ZIP_MAGIC = b"PK\x03\x04"
+
+NO_CHAT_ERROR = "No chat .txt found inside the .zip export."
+BAD_ZIP_ERROR = "The .zip export is damaged or not a zip file."
+
+
+class ExportError(ValueError):
+    """
+    An export that holds no readable chat (message shown to the user).
+    """
+
+
+def is_zip(source):
+    """
+    Whether `source` (path, bytes or seekable file-like) holds a zip
+    archive. A str is chat text, never a zip.
+    """
+    if isinstance(source, str):
+        return False
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return bytes(source[:len(ZIP_MAGIC)]) == ZIP_MAGIC
+    if isinstance(source, os.PathLike):
+        with open(source, "rb") as f:
+            return f.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+    if not (hasattr(source, "seekable") and source.seekable()):
+        return False
+    start = source.tell()
+    head = source.read(len(ZIP_MAGIC))
+    source.seek(start)
+    return head == ZIP_MAGIC
+
+
+def chat_member(zf):
+    """
+    The chat text member of an export archive, or None.
+    """
+    # WhatsApp names it "_chat.txt" (iOS) or "WhatsApp Chat with ….txt"
+    texts = [m for m in zf.infolist() if not m.is_dir() and m.filename.lower().endswith(".txt")]
+    if not texts:
+        return None
+    for member in texts:
+        if os.path.basename(member.filename) == "_chat.txt":
+            return member
+    return max(texts, key=lambda m: m.file_size)
+
+
+@contextmanager
+def open_chat(source):
+    """
+    The chat text of an export as a source for parse_stream() /
+    content_hash(): a .zip's chat member (a seekable stream decompressing on
+    read), a memory-mapped local file, or `source` itself. Seekable
+    file-like sources are rewound on exit. Raises ExportError for a .zip
+    without a chat or a damaged one.
+    """
+    if not is_zip(source):
+        if isinstance(source, os.PathLike):
+            with _mapped(source) as data:
+                yield data
+        else:
+            yield source
+        return
+
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        f, close = io.BytesIO(source), None
+    elif isinstance(source, os.PathLike):
+        f = open(source, "rb")
+        close = f.close
+    else:
+        f, start = source, source.tell()
+        close = lambda: source.seek(start)  # noqa: E731
+
+    try:
+        try:
+            zf = zipfile.ZipFile(f)
+        except zipfile.BadZipFile:
+            raise ExportError(BAD_ZIP_ERROR) from None
+        with zf:
+            member = chat_member(zf)
+            if member is None:
+                raise ExportError(NO_CHAT_ERROR)
+            with zf.open(member) as chat:
+                yield chat
+    finally:
+        if close is not None:
+            close()
+
+
+@contextmanager
+def _mapped(path):
+    # read-only map of a local file (empty files cannot be mapped)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield data
+    finally:
+        try:
+            data.close()
+        except BufferError:
+            # a view of the map is still alive (e.g. an aborted parse);
+            # the map is released once that view is collected
+            pass
@@ -0,0 +1,180 @@
+# chat_store.py — PERSISTENT COLUMNAR STORE FOR PARSED CHATS (ARROW IPC + MMAP)
+
+import os
+import re
+import threading
+from helper import FORMAT_ERROR, parse_chat, build_report
+from chat_source import ExportError, open_chat
+from instrument import timed
+from incremental import (
+    fingerprint, remember, find_prefix, extend_messages, fingerprint_length, fingerprint_format,
+)
+
+# Set CHAT_STORE_DIR to persist parsed chats across sessions / restarts
+DEFAULT_STORE_DIR = os.environ.get("CHAT_STORE_DIR") or None
+
+STORE_SUFFIX = ".messages.arrow"
+
+# Bump when the messages frame layout (columns, dtypes, parsing) changes.
+# Stored frames are keyed by the export's content hash and this version, so
+# report layout changes (report_cache.CACHE_VERSION) keep them valid.
+STORE_VERSION = "1"
+
+# Content-keyed store files (any version); other names are left alone
+_STORE_FILE = re.compile(r"^[0-9a-f]{64}(?:\.v\w+)?" + re.escape(STORE_SUFFIX) + "$")
+
+_pruned = set()
+_prune_lock = threading.Lock()
+
+
+def _store_path(key, store_dir):
+    return os.path.join(store_dir, f"{key}.v{STORE_VERSION}{STORE_SUFFIX}")
+
+
+def prune_store(store_dir=DEFAULT_STORE_DIR):
+    """
+    Delete the stored frames of other STORE_VERSIONs (never loaded again).
+    Returns the number of files removed.
+    """
+    if not store_dir or not os.path.isdir(store_dir):
+        return 0
+    current = f".v{STORE_VERSION}{STORE_SUFFIX}"
+    removed = 0
+    for name in os.listdir(store_dir):
+        if _STORE_FILE.match(name) and not name.endswith(current):
+            try:
+                os.remove(os.path.join(store_dir, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def save_messages(df, key, store_dir=DEFAULT_STORE_DIR):
+    """
+    Write the parsed messages frame (incl. derived + sentiment columns) to an
+    uncompressed Arrow IPC file named after the content hash and
+    STORE_VERSION; stale versions are pruned once per process.
+    Returns the path, or None if the store is disabled / pyarrow is missing.
+    """
+    if not store_dir:
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    os.makedirs(store_dir, exist_ok=True)
+    with _prune_lock:
+        if store_dir not in _pruned:
+            _pruned.add(store_dir)
+            prune_store(store_dir)
+    path = _store_path(key, store_dir)
+    tmp = path + ".tmp"
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def is_stored(key, store_dir=DEFAULT_STORE_DIR):
+    """
+    Whether the messages frame of `key` is in the store.
+    """
+    return bool(store_dir) and os.path.exists(_store_path(key, store_dir))
+
+
+def load_messages(key, store_dir=DEFAULT_STORE_DIR):
+    """
+    Memory-map a stored messages frame. Returns None if it is not stored.
+    """
+    if not store_dir:
+        return None
+    path = _store_path(key, store_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    try:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        # truncated / foreign file: drop it and let the caller re-parse
+        return None
+
+
+def _extend_known(source, store_dir, timings=None):
+    """
+    (messages frame, base report, ChatFormat) of `source` built from an
+    already analyzed export it extends (see incremental.py), or (None, None,
+    None). The base report is that export's cached report, if its frame was
+    reused.
+    """
+    # the report cache imports this module lazily
+    from report_cache import REPORT_CACHE
+
+    old_key = find_prefix(source, store_dir)
+    if old_key is None:
+        return None, None, None
+
+    with timed(timings, "extend", rows=lambda: 0 if df is None else len(df)):
+        cached = REPORT_CACHE.get(old_key)
+        base = cached.peek("messages_df") if hasattr(cached, "peek") else None
+        if base is None:
+            cached, base = None, load_messages(old_key, store_dir)
+        df, fmt = extend_messages(
+            source, base, fingerprint_length(old_key, store_dir), fingerprint_format(old_key, store_dir)
+        )
+    return df, None if df is None else cached, fmt
+
+
+def analyze_stored(source, key, store_dir=DEFAULT_STORE_DIR, incremental=True, progress=None):
+    """
+    analyze_text() backed by the on-disk store: a stored chat skips the
+    regex parse (and the sentiment pass once it has run for that chat);
+    a newer export of a known chat only parses its new messages
+    (unless `incremental` is False); a new chat is parsed and then stored.
+    `progress(lines)` is passed on to the parser. A .zip export is read
+    from its chat member, a local path memory-mapped (see chat_source.py).
+    """
+    try:
+        with open_chat(source) as chat:
+            return _analyze_chat(chat, key, store_dir, incremental, progress)
+    except ExportError as exc:
+        return {"error": str(exc)}
+
+
+def _analyze_chat(source, key, store_dir, incremental, progress):
+    timings = []
+    base = fmt = None
+    # fingerprint before parsing consumes a file-like upload
+    entry = fingerprint(source)
+    with timed(timings if store_dir else None, "load", rows=lambda: 0 if df is None else len(df)):
+        df = load_messages(key, store_dir)
+    if df is None:
+        if incremental:
+            df, base, fmt = _extend_known(source, store_dir, timings)
+        if df is None:
+            df, fmt = parse_chat(source, timings, progress)
+        if df is None:
+            return {"error": FORMAT_ERROR}
+        save_messages(df, key, store_dir)
+    remember(key, entry, store_dir, fmt)
+
+    # metrics the base report has computed are carried over (extend_messages
+    # keeps all but its last message as the first rows)
+    reused = 0 if base is None else len(base["messages_df"]) - 1
+    if not store_dir:
+        return build_report(df, key=key, timings=timings, base=base, reused=reused)
+    # re-save once lazily computed columns (sentiment) are added
+    return build_report(
+        df, on_update=lambda updated: save_messages(updated, key, store_dir), key=key, timings=timings,
+        base=base, reused=reused,
+    )
@@ -0,0 +1,201 @@
+# features.py — PER-MESSAGE FEATURE ENGINES (DEDUP, LINKS, EMOJI)
+
+import re
+from collections import Counter, namedtuple
+from functools import lru_cache
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+# Cheap vectorized prefilter: only messages matching this go through URLExtract
+# (a scheme, "www." or a dot followed by 2+ letters, i.e. a possible TLD)
+LINK_CANDIDATE_PATTERN = r"https?:|www\.|\.[^\W\d_]{2,}"
+
+# Messages without any non-ASCII character cannot contain an emoji
+EMOJI_CANDIDATE_PATTERN = r"[^\x00-\x7f]"
+
+# Media placeholders: Android "<Media omitted>", iOS "image omitted",
+# "video omitted", … (a document's is "<name> • 3 pages document omitted")
+MEDIA_PATTERN = r"media omitted|\b(?:image|video|audio|sticker|gif|document|contact card) omitted$"
+
+_extractor_cache = {}
+_emoji_cache = {}
+
+
+def get_url_extractor():
+    """
+    One URLExtract per process (building it loads the TLD list).
+    """
+    if "extractor" not in _extractor_cache:
+        from urlextract import URLExtract
+        _extractor_cache["extractor"] = URLExtract()
+    return _extractor_cache["extractor"]
+
+
+# --------------------------------------------------------
+#                DEDUP
+# --------------------------------------------------------
+class UniqueMessages(namedtuple("UniqueMessages", "codes texts counts")):
+    """
+    A message column factorized once: `texts` are the distinct messages (a
+    Series), `codes` map every row to its text, `counts` is how often each
+    text occurs. Per-message features are computed on `texts` and gathered
+    back with broadcast().
+    """
+
+    @property
+    def ratio(self):
+        """
+        Messages per distinct text (1.0 = no repeats).
+        """
+        return len(self.codes) / len(self.texts) if len(self.texts) else 1.0
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.counts.nbytes + int(self.texts.memory_usage(deep=True))
+
+    def broadcast(self, values, index=None):
+        """
+        Per-text `values` (array or Series) expanded to one value per row.
+        """
+        if isinstance(values, pd.Series):
+            return pd.Series(values.to_numpy()[self.codes], index=index, name=values.name)
+        return np.asarray(values)[self.codes]
+
+
+def unique_messages(messages):
+    """
+    UniqueMessages of a message Series (missing messages are one text).
+    """
+    codes, uniques = pd.factorize(messages, use_na_sentinel=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+    return UniqueMessages(codes, pd.Series(uniques, name=messages.name), counts)
+
+
+# --------------------------------------------------------
+#                MEDIA
+# --------------------------------------------------------
+def media_flags(messages):
+    """
+    Whether each message of a pandas Series is a media placeholder (bool
+    array).
+    """
+    text = messages.astype(str)
+    return text.str.contains(MEDIA_PATTERN, case=False, regex=True, na=False).to_numpy(bool)
+
+
+# --------------------------------------------------------
+#                LINKS
+# --------------------------------------------------------
+def link_counts(messages):
+    """
+    Number of URLs in every message of a pandas Series (int32 array).
+    A vectorized str.contains picks candidate messages; only those are
+    scanned by the shared URLExtract instance.
+    """
+    counts = np.zeros(len(messages), dtype=np.int32)
+    text = messages.astype(str)
+    candidates = np.flatnonzero(
+        text.str.contains(LINK_CANDIDATE_PATTERN, case=False, regex=True, na=False).to_numpy()
+    )
+    if len(candidates):
+        find_urls = get_url_extractor().find_urls
+        counts[candidates] = [len(find_urls(m)) for m in text.iloc[candidates]]
+    return counts
+
+
+# --------------------------------------------------------
+#                EMOJI
+# --------------------------------------------------------
+def _char_ranges(chars, max_gap=0):
+    """
+    Regex class body with close code points collapsed into ranges. A coarse
+    class (few ranges) keeps the C-level scan fast; gaps it lets through are
+    dropped again by the trie walk.
+    """
+    points = sorted(map(ord, set(chars)))
+    parts = []
+    k = 0
+    while k < len(points):
+        j = k
+        while j + 1 < len(points) and points[j + 1] - points[j] <= max_gap + 1:
+            j += 1
+        lo, hi = re.escape(chr(points[k])), re.escape(chr(points[j]))
+        parts.append(lo if j == k else lo + "-" + hi)
+        k = j + 1
+    return "".join(parts)
+
+
+def get_emoji_engine():
+    """
+    (run regex, segmenter) built once per process from emoji.EMOJI_DATA.
+    The regex finds maximal runs of characters that can appear in an emoji
+    (a single C-level charset scan); the segmenter walks a trie over each
+    run taking the longest sequence at every step, so ZWJ families, skin
+    tones, keycaps and flags count as one emoji.
+    """
+    if "engine" in _emoji_cache:
+        return _emoji_cache["engine"]
+
+    import emoji
+
+    trie = {}
+    chars = set()
+    for seq in emoji.EMOJI_DATA:
+        node = trie
+        for ch in seq:
+            node = node.setdefault(ch, {})
+        node[None] = seq
+        chars.update(seq)
+
+    # ASCII only shows up as keycap bases (#, *, 0-9 + U+20E3)
+    ascii_bases = "".join(sorted(c for c in chars if c < "\x80"))
+    wide = _char_ranges((c for c in chars if c >= "\x80"), max_gap=255)
+    runs = re.compile(
+        "[" + re.escape(ascii_bases) + "]\ufe0f?\u20e3[" + wide + "]*|[" + wide + "]+"
+    )
+
+    @lru_cache(maxsize=1 << 16)
+    def segment(run):
+        found = []
+        i, n = 0, len(run)
+        while i < n:
+            node, j, last, last_end = trie, i, None, i + 1
+            while j < n and run[j] in node:
+                node = node[run[j]]
+                j += 1
+                if None in node:
+                    last, last_end = node[None], j
+            if last is not None:
+                found.append(last)
+            i = last_end
+        return tuple(found)
+
+    _emoji_cache["engine"] = (runs, segment)
+    return _emoji_cache["engine"]
+
+
+def extract_emojis(messages):
+    """
+    Tuple of emoji sequences per message (a pandas Series aligned with
+    `messages`); messages without emoji share the empty tuple.
+    """
+    text = messages.astype(str)
+    out = np.empty(len(text), dtype=object)
+    out[:] = [()] * len(text)
+
+    candidates = np.flatnonzero(text.str.contains(EMOJI_CANDIDATE_PATTERN, regex=True, na=False).to_numpy())
+    if len(candidates):
+        runs, segment = get_emoji_engine()
+        findall = runs.findall
+        out[candidates] = [
+            tuple(chain.from_iterable(map(segment, findall(m)))) for m in text.iloc[candidates]
+        ]
+    return pd.Series(out, index=messages.index, name="emojis")
+
+
+def emoji_counter(emoji_lists):
+    """
+    Counter of emoji over (a filtered view of) the per-message emoji column.
+    """
+    return Counter(chain.from_iterable(emoji_lists))
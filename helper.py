@@ -1,23 +1,23 @@
-# helper.py — FINAL STABLE VERSION WITH SAFE PDF WRITER & EMOJI SUPPORT
+# helper.py — CHAT ANALYSIS ENTRY POINTS AND THE LAZY REPORT
 
-import re
-import os
-import io
-import tempfile
+import threading
+import numpy as np
 import pandas as pd
-from collections import Counter
-from wordcloud import WordCloud
-import emoji
-from urlextract import URLExtract
-from preprocessor import preprocess
-from textblob import TextBlob
-
-# NLTK safe import
-import nltk
-# NOTE: adjust this path if your nltk_data is located elsewhere
-nltk.data.path.append(r"C:\Users\Arjun\PycharmProjects\whatsappchat\nltk_data")
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
+from collections.abc import MutableMapping
+from features import link_counts, extract_emojis, emoji_counter, unique_messages, media_flags
+from chat_parser import parse_stream, parse_datetimes, settle_format
+from chat_source import ExportError, open_chat
+from sentiment import SENTIMENT_WORKERS, polarity_scores
+from user_index import OVERALL, build_user_index, extend_user_index, user_word_counts
+from rollup import build_rollup, extend_rollup
+from words import merge_counts
+from wordclouds import render_wordcloud
+from instrument import timed, count
+from report_cache import value_nbytes
+from summarizer import summarize_text, summarize_messages  # noqa: F401 (re-exported for the pages)
+from pdf_report import export_report_pdf  # noqa: F401 (re-exported for the pages)
+
+FORMAT_ERROR = "Chat format not recognized. Upload original WhatsApp export (.txt or .zip)."
 
 
 # --------------------------------------------------------
@@ -26,279 +26,526 @@ from nltk.corpus import stopwords
 def analyze_text(raw):
     """
     Parse WhatsApp export text and return analytics dictionary.
+    `raw` may be a str, bytes, a path or a file-like object (e.g. a Streamlit
+    upload), a plain-text or a .zip export; it is streamed through the
+    parser in chunks (see chat_source.open_chat).
     """
-    text = preprocess(raw)
-
-    # Pattern: 12/31/20, 11:59 PM - Name: message
-    pattern = r'^(\d{1,2}/\d{1,2}/\d{2,4}),\s*(\d{1,2}:\d{2}\s*[APMapm]{2})\s*-\s*([^:]+):\s*(.*)$'
-    messages = []
-
-    for line in text.splitlines():
-        line = line.strip()
-        match = re.match(pattern, line)
-        if match:
-            date_str, time_str, user, msg = match.groups()
-            messages.append([date_str, time_str, user.strip(), msg])
-        else:
-            # continuation of previous message
-            if messages:
-                messages[-1][3] += " " + line
-
-    if not messages:
-        return {"error": "Chat format not recognized. Upload original WhatsApp export (.txt)."}
-
-    df = pd.DataFrame(messages, columns=["date", "time", "user", "message"])
-
-    # Convert to datetime (best-effort)
-    df["datetime"] = pd.to_datetime(df["date"] + " " + df["time"], errors="coerce")
-
-    # Derived columns
-    df["only_date"] = df["datetime"].dt.date
-    df["month"]     = df["datetime"].dt.month_name()
-    df["day_name"]  = df["datetime"].dt.day_name()
-    df["year"]      = df["datetime"].dt.year
-    df["hour"]      = df["datetime"].dt.hour
-
-    # Basic metrics
-    total_messages = len(df)
-    total_words = sum(len(str(m).split()) for m in df["message"])
-
-    extractor = URLExtract()
-    links_shared = sum(len(extractor.find_urls(str(m))) for m in df["message"])
-
-    media_shared = df[df["message"].str.contains("<Media omitted>", na=False)].shape[0]
-
-    # Timelines
-    monthly_timeline = df.groupby([df["year"], df["month"]]).size().reset_index(name="count")
-    daily_timeline   = df.groupby("only_date").size().reset_index(name="count")
-
-    # Busiest
-    most_busy_day   = df["day_name"].value_counts().reset_index().rename(columns={"index": "day", "day_name": "count"})
-    most_busy_month = df["month"].value_counts().reset_index().rename(columns={"index": "month", "month": "count"})
-    most_busy_users = df["user"].value_counts().reset_index().rename(columns={"index": "user", "user": "messages"})
-
-    # Emoji analysis
-    all_emojis = []
-    for msg in df["message"].astype(str):
-        all_emojis.extend([c for c in msg if c in emoji.EMOJI_DATA])
-    emoji_analysis = Counter(all_emojis).most_common(50)
-
-    # Wordcloud image (bytes)
-    text_blob = " ".join(df["message"].astype(str).tolist())
-    wc = WordCloud(width=800, height=400, background_color="white").generate(text_blob)
-    buf = io.BytesIO()
-    wc.to_image().save(buf, format="PNG")
-    buf.seek(0)
-    wordcloud_bytes = buf.getvalue()
-
-    # Common words
-    words = []
-    for msg in df["message"].astype(str):
-        for w in re.findall(r"[a-zA-Z]{2,}", msg.lower()):
-            words.append(w)
-    common_words = Counter(words).most_common(100)
-
-    # Sentiment (TextBlob)
-    def sentiment_score(s):
-        try:
-            return TextBlob(s).sentiment.polarity
-        except:
-            return 0.0
-    df["sentiment"] = df["message"].astype(str).apply(sentiment_score)
-
-    overview = {
-        "total_messages": total_messages,
-        "total_words": total_words,
-        "media_shared": media_shared,
-        "links_shared": links_shared,
-        "first_message": str(df["datetime"].dropna().iloc[0]) if df["datetime"].notna().any() else None,
-        "last_message": str(df["datetime"].dropna().iloc[-1]) if df["datetime"].notna().any() else None
-    }
+    timings = []
+    try:
+        with open_chat(raw) as chat:
+            df = parse_messages(chat, timings)
+    except ExportError as exc:
+        return {"error": str(exc)}
 
-    return {
-        "messages_df": df,
-        "overview": overview,
-        "top_senders": list(most_busy_users.itertuples(index=False, name=None)),
-        "emoji_analysis": emoji_analysis,
-        "most_common_words": common_words,
-        "wordcloud_image_bytes": wordcloud_bytes,
-        "monthly_timeline": monthly_timeline.to_dict(orient="records"),
-        "daily_timeline": daily_timeline.to_dict(orient="records"),
-        "most_busy_day": most_busy_day.to_dict(orient="records"),
-        "most_busy_month": most_busy_month.to_dict(orient="records"),
-        "most_busy_users": most_busy_users.to_dict(orient="records"),
-        "sentiment_series": df[["datetime", "sentiment"]].dropna().to_dict(orient="records")
-    }
+    if df is None:
+        return {"error": FORMAT_ERROR}
 
+    return build_report(df, timings=timings)
 
-# --------------------------------------------------------
-#                SUMMARIZER
-# --------------------------------------------------------
-def summarize_text(text, max_sentences=4):
+
+def parse_messages(raw, timings=None, progress=None):
     """
-    Simple extractive summarizer (sentence scoring by frequency).
+    Parse an export into the per-message frame (with derived columns).
+    Returns None if no message line was recognized. Stage timings are
+    appended to `timings` when given; `progress(lines)` is called as lines
+    are parsed (see parse_stream).
     """
-    if not isinstance(text, str) or not text.strip():
-        return ""
+    return parse_chat(raw, timings, progress)[0]
 
-    sentences = sent_tokenize(text)
-    if len(sentences) <= max_sentences:
-        return " ".join(sentences)
 
-    stop_words = set(stopwords.words("english"))
-    freq = {}
-    for word in word_tokenize(text.lower()):
-        if word.isalpha() and word not in stop_words:
-            freq[word] = freq.get(word, 0) + 1
+def parse_chat(raw, timings=None, progress=None):
+    """
+    parse_messages(), also returning the ChatFormat the frame was parsed
+    with: (frame, format), or (None, None). The format's day/month order
+    is final unless every date reads both ways (see settle_format).
+    """
+    with timed(timings, "parse", rows=lambda: len(columns["message"])):
+        columns, fmt = parse_stream(raw, progress=progress)
 
-    scored = []
-    for sent in sentences:
-        score = sum(freq.get(w, 0) for w in word_tokenize(sent.lower()))
-        scored.append((sent, score))
+    if not columns["message"]:
+        return None, None
 
-    top = sorted(scored, key=lambda x: x[1], reverse=True)[:max_sentences]
-    selected = [s for s in sentences if s in dict(top)]
-    return " ".join(selected)
+    fmt = settle_format(columns["date"], fmt)
+    return frame_from_columns(columns, fmt, timings), fmt
 
 
-# --------------------------------------------------------
-#       SAFE TEXT WRITER (avoids multi_cell Unicode crash)
-# --------------------------------------------------------
-def _safe_write(pdf, text, font_name="Noto", font_size=12, emoji_mode=False, max_width_mm=180):
+def frame_from_columns(columns, fmt, timings=None):
+    """
+    Build the per-message frame from parser column buffers.
+    The raw date / time strings are only used to parse `datetime`.
+    """
+    rows = len(columns["message"])
+
+    # Convert to datetime with the detected explicit format
+    with timed(timings, "datetime", rows):
+        stamps = parse_datetimes(columns["date"], columns["time"], fmt)
+
+    with timed(timings, "frame", rows):
+        df = pd.DataFrame({"user": columns["user"], "message": columns["message"], "datetime": stamps})
+
+        # Derived columns
+        df["only_date"] = df["datetime"].dt.normalize()
+        df["month"]     = df["datetime"].dt.month_name()
+        df["day_name"]  = df["datetime"].dt.day_name()
+        df["year"]      = df["datetime"].dt.year
+        df["hour"]      = df["datetime"].dt.hour
+
+        df = compact_messages(df)
+    return df
+
+
+def _message_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return object
+    try:
+        # NaN-missing Arrow strings: pandas 3's default "str" dtype
+        return pd.StringDtype("pyarrow", na_value=float("nan"))
+    except TypeError:
+        return pd.StringDtype("pyarrow")
+
+
+MESSAGE_DTYPE = _message_dtype()
+
+# Repeated names are stored once per chat
+CATEGORY_COLUMNS = ("user", "month", "day_name")
+SMALL_INT_COLUMNS = {"year": "Int16", "hour": "Int8"}
+
+
+def compact_messages(df):
+    """
+    Bring a messages frame to the compact layout: categorical names,
+    Arrow-backed message text, nullable small ints for year / hour.
+    Columns already in that layout are left untouched.
+    """
+    for col in CATEGORY_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if df["message"].dtype != MESSAGE_DTYPE:
+        df["message"] = df["message"].astype(MESSAGE_DTYPE)
+    for col, dtype in SMALL_INT_COLUMNS.items():
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+# Per-message feature columns: name -> fn(message Series) -> values.
+# Computed lazily for a whole chat, or for just the new rows of an export,
+# on the distinct message texts only ("ok", "<Media omitted>", stickers …
+# repeat a lot) and broadcast back to the rows.
+MESSAGE_COLUMNS = {
+    # Sentiment (TextBlob lexicon, scored in vectorized batches)
+    "sentiment": lambda messages: polarity_scores(messages, workers=SENTIMENT_WORKERS),
+    # URL count per message, so any filtered view can just sum it
+    "links": link_counts,
+    # emoji sequences per message, so per-user / per-range views don't rescan
+    "emojis": extract_emojis,
+}
+
+
+def add_message_columns(df, names, unique=None):
+    """
+    Compute the given MESSAGE_COLUMNS that `df` does not have yet, once per
+    distinct text. `unique` is the message column's UniqueMessages, if
+    already factorized.
+    """
+    for name in names:
+        if name not in df.columns:
+            if unique is None:
+                unique = unique_messages(df["message"])
+            df[name] = unique.broadcast(MESSAGE_COLUMNS[name](unique.texts), df.index)
+    return df
+
+
+def build_report(df, on_update=None, key=None, timings=None, base=None, reused=0):
     """
-    Write text safely into the PDF using manual wrapping.
-    - pdf: FPDF instance
-    - text: string to write
-    - font_name: registered font name to use
-    - font_size: integer font size
-    - emoji_mode: if True, writes lines using Emoji font and uses cell()
-    - max_width_mm: approximate printable width in mm (default A4 inner width)
+    Wrap a parsed messages frame in a LazyReport; metrics are computed on
+    first access. `on_update(df)` is called when a lazily computed column
+    (e.g. sentiment) is added to the frame. `key` is the chat's content hash,
+    used to cache renders (word clouds) across reports of the same chat.
+    `timings` (stages already run, e.g. parsing) becomes report["timings"];
+    every lazily computed metric appends its own entry.
+    `base` is the report of an earlier export of the chat whose first
+    `reused` messages are the first rows of `df`: the INCREMENTAL_METRICS
+    it has computed are carried over, only the other rows are counted.
     """
-    # Set font
-    pdf.set_font(font_name, "", font_size)
-
-    # Normalize text
-    if text is None:
-        text = ""
-
-    # If emoji mode: write each line with cell (no wrapping) to avoid width calc problems
-    if emoji_mode:
-        lines = str(text).splitlines() or [str(text)]
-        for ln in lines:
-            # use cell to print single line (safer for emojis)
-            pdf.cell(0, font_size * 0.6 + 2, ln, ln=True)
-        return
-
-    # Manual wrap for non-emoji text
-    words = str(text).split()
-    if not words:
-        pdf.cell(0, font_size * 0.6 + 2, "", ln=True)
-        return
-
-    current_line = ""
-    for w in words:
-        test_line = (current_line + " " + w).strip() if current_line else w
-        # get_string_width returns mm for current font/size
-        if pdf.get_string_width(test_line) > max_width_mm:
-            # flush current_line
-            pdf.cell(0, font_size * 0.6 + 2, current_line, ln=True)
-            current_line = w
-        else:
-            current_line = test_line
-
-    if current_line:
-        pdf.cell(0, font_size * 0.6 + 2, current_line, ln=True)
+    report = LazyReport(df, on_update=on_update, key=key, timings=timings)
+    if base is not None:
+        report.extend(base, reused)
+    return report
 
 
 # --------------------------------------------------------
-#                PDF EXPORT (UNICODE + EMOJI SAFE)
+#                LAZY REPORT
 # --------------------------------------------------------
-def export_report_pdf(report, selected_user="Overall", output_path=None):
+REPORT_METRICS = {}
+
+
+def report_metric(name):
     """
-    Export a report to a PDF file with Unicode + emoji support.
-    Requires these files in ./fonts/:
-      - NotoSans-Regular.ttf
-      - NotoEmoji-Regular.ttf
+    Register `fn(report)` as the producer of report[name].
     """
-    from fpdf import FPDF
-
-    # create temporary output path if not provided
-    if output_path is None:
-        fd, out_path = tempfile.mkstemp(suffix=".pdf")
-        os.close(fd)
-        output_path = out_path
-
-    pdf = FPDF(format="A4")
-    pdf.add_page()
-    pdf.set_auto_page_break(True, margin=15)
-
-    # font files expected
-    sans_path = os.path.join("fonts", "NotoSans-Regular.ttf")
-    emoji_path = os.path.join("fonts", "NotoEmoji-Regular.ttf")
-
-    if not os.path.exists(sans_path):
-        raise FileNotFoundError("Missing font file: fonts/NotoSans-Regular.ttf")
-    if not os.path.exists(emoji_path):
-        raise FileNotFoundError("Missing font file: fonts/NotoEmoji-Regular.ttf")
-
-    # register fonts
-    pdf.add_font("Noto", "", sans_path, uni=True)
-    pdf.add_font("Emoji", "", emoji_path, uni=True)
-
-    # Title
-    pdf.set_font("Noto", "", 16)
-    pdf.cell(0, 10, f"WhatsApp Analysis — {selected_user}", ln=True, align="C")
-    pdf.ln(4)
-
-    # Overview
-    ov = report.get("overview", {})
-    _safe_write(pdf, f"Total Messages: {ov.get('total_messages','-')}", font_name="Noto", font_size=12)
-    _safe_write(pdf, f"Total Words: {ov.get('total_words','-')}", font_name="Noto", font_size=12)
-    _safe_write(pdf, f"Media Shared: {ov.get('media_shared','-')}", font_name="Noto", font_size=12)
-    _safe_write(pdf, f"Links Shared: {ov.get('links_shared','-')}", font_name="Noto", font_size=12)
-    pdf.ln(2)
-
-    # Top senders
-    _safe_write(pdf, "Top Senders:", font_name="Noto", font_size=14)
-    for user, cnt in report.get("top_senders", [])[:10]:
-        _safe_write(pdf, f"- {user}: {cnt}", font_name="Noto", font_size=11)
-    pdf.ln(2)
-
-    # Top words
-    _safe_write(pdf, "Top Words:", font_name="Noto", font_size=14)
-    for w, c in report.get("most_common_words", [])[:15]:
-        _safe_write(pdf, f"- {w}: {c}", font_name="Noto", font_size=11)
-    pdf.ln(2)
-
-    # Emoji usage (use emoji font and safe cell printing)
-    _safe_write(pdf, "Emoji Usage:", font_name="Noto", font_size=14)
-    for e, c in report.get("emoji_analysis", [])[:30]:
-        # combine short label with count; write with emoji font to render glyphs
-        _safe_write(pdf, f"{e}  ×{c}", font_name="Emoji", font_size=12, emoji_mode=True)
-
-    pdf.ln(4)
-
-    # Summary (if present)
-    if "summary" in report and report["summary"]:
-        _safe_write(pdf, "Auto Summary:", font_name="Noto", font_size=14)
-        _safe_write(pdf, report["summary"], font_name="Noto", font_size=11)
-
-    pdf.ln(4)
-
-    # Wordcloud image (if present)
-    wc_bytes = report.get("wordcloud_image_bytes") or report.get("wordcloud")
-    if wc_bytes:
-        fd_img, img_path = tempfile.mkstemp(suffix=".png")
-        os.close(fd_img)
-        with open(img_path, "wb") as f:
-            f.write(wc_bytes)
-        # Put image full width minus margins
-        pdf.image(img_path, x=15, w=180)
-        try:
-            os.remove(img_path)
-        except Exception:
-            pass
-
-    # finalize
-    pdf.output(output_path)
-    return output_path
+    def register(fn):
+        REPORT_METRICS[name] = fn
+        return fn
+    return register
+
+
+# Metrics that can be carried over from the report of an earlier export
+INCREMENTAL_METRICS = {}
+
+
+def incremental_metric(name):
+    """
+    Register `fn(report, seed, reused, dropped)` as the producer of
+    report[name] for a report extending an earlier export (see
+    build_report): `seed` is the earlier report's value, `dropped` the
+    frame of its messages after the first `reused` (re-parsed in the new
+    export), whose counts are to be taken out of `seed`.
+    """
+    def register(fn):
+        INCREMENTAL_METRICS[name] = fn
+        return fn
+    return register
+
+
+class LazyReport(MutableMapping):
+    """
+    Dict-like analytics report. Each metric in REPORT_METRICS is computed on
+    first access and memoized, so a page only pays for what it renders.
+    copy() returns a page-local overlay: assignments stay local, lookups of
+    metrics still go through (and fill) the shared memo. Each metric has its
+    own lock, so a page reading one metric never waits on another being
+    computed in the background. `nbytes` is the footprint of what has been
+    computed so far.
+    """
+
+    def __init__(self, df, on_update=None, parent=None, key=None, timings=None):
+        self.key = key
+        self._values = {"messages_df": df}
+        if parent is None:
+            self._values["timings"] = [] if timings is None else timings
+        self._parent = parent
+        self._on_update = on_update
+        self._locks = {}    # metric name -> lock held while computing it
+        self._locks_lock = threading.Lock()
+        self._sizes = {}
+        self._seeds = {}
+        self._extends = None
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        if self._parent is not None:
+            return self._parent[key]
+
+        producer = REPORT_METRICS.get(key)
+        if producer is None:
+            raise KeyError(key)
+        with self._metric_lock(key):
+            if key not in self._values:
+                df = self._values["messages_df"]
+                with timed(self._values.get("timings"), key, len(df)):
+                    seed = self._seeds.pop(key, None)
+                    if seed is not None:
+                        self._values[key] = INCREMENTAL_METRICS[key](self, seed, *self._extends)
+                    else:
+                        self._values[key] = producer(self)
+            return self._values[key]
+
+    def _metric_lock(self, key):
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.RLock()
+            return lock
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+        self._sizes.pop(key, None)
+
+    def __delitem__(self, key):
+        del self._values[key]
+        self._sizes.pop(key, None)
+
+    def __contains__(self, key):
+        return (
+            key in self._values
+            or key in REPORT_METRICS
+            or (self._parent is not None and key in self._parent)
+        )
+
+    def __iter__(self):
+        keys = dict.fromkeys(self._values)
+        keys.update(dict.fromkeys(REPORT_METRICS))
+        if self._parent is not None:
+            keys.update(dict.fromkeys(self._parent))
+        return iter(keys)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        return LazyReport(self._values["messages_df"], parent=self, key=self.key)
+
+    def extend(self, base, reused):
+        """
+        Seed the INCREMENTAL_METRICS from those `base` has computed (see
+        build_report). Only the values are kept, not `base` itself.
+        """
+        self._seeds = {name: base.peek(name) for name in INCREMENTAL_METRICS if base.peek(name) is not None}
+        if self._seeds:
+            self._extends = (reused, base.peek("messages_df").iloc[reused:].copy())
+
+    def peek(self, key, default=None):
+        """
+        Return a metric only if it has already been computed.
+        """
+        if key in self._values:
+            return self._values[key]
+        if self._parent is not None:
+            return self._parent.peek(key, default)
+        return default
+
+    def add_column(self, name, values):
+        """
+        Add a per-message column to the shared frame. Columns computed on
+        different threads are inserted (and the frame re-saved) one at a time.
+        """
+        if self._parent is not None:
+            self._parent.add_column(name, values)
+            return
+        with self._metric_lock("messages_df"):
+            self._values["messages_df"][name] = values
+            self.column_added()
+
+    def column_added(self):
+        if self._parent is not None:
+            self._parent.column_added()
+            return
+        self._sizes.pop("messages_df", None)
+        if self._on_update is not None:
+            self._on_update(self._values["messages_df"])
+
+    @property
+    def nbytes(self):
+        """
+        Approximate footprint of the values computed so far. Each is measured
+        once, the message frame again whenever a column is added to it; the
+        per-message column metrics are that frame's columns.
+        """
+        for key, value in list(self._values.items()):
+            if key not in self._sizes and key not in MESSAGE_COLUMNS:
+                self._sizes[key] = value_nbytes(value)
+        return sum(self._sizes.values())
+
+    def __getstate__(self):
+        # locks and callbacks do not survive pickling (disk spill)
+        return {
+            "values": self._values, "parent": self._parent, "key": self.key,
+            "seeds": self._seeds, "extends": self._extends,
+        }
+
+    def __setstate__(self, state):
+        self.key = state.get("key")
+        self._values = state["values"]
+        self._parent = state["parent"]
+        self._on_update = None
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._sizes = {}
+        self._seeds = state.get("seeds", {})
+        self._extends = state.get("extends")
+
+
+def _message_column_metric(name):
+    def produce(report):
+        df = report["messages_df"]
+        if name not in df.columns:
+            unique = report["unique_messages"]
+            report.add_column(name, unique.broadcast(MESSAGE_COLUMNS[name](unique.texts), df.index))
+        return df[name]
+    return produce
+
+
+for _name in MESSAGE_COLUMNS:
+    report_metric(_name)(_message_column_metric(_name))
+
+
+@report_metric("unique_messages")
+def _unique_messages(report):
+    unique = unique_messages(report["messages_df"]["message"])
+    count(report["timings"], "dedup_ratio", round(unique.ratio, 3))
+    return unique
+
+
+def _text_totals(unique, links):
+    # (words, media, links) of the messages `unique` was built from
+    words = np.fromiter((len(str(m).split()) for m in unique.texts), dtype=np.int64, count=len(unique.texts))
+    media = media_flags(unique.texts)
+    return int(words @ unique.counts), int(unique.counts[media].sum()), int(links.sum())
+
+
+@report_metric("overview")
+def _overview(report):
+    df = report["messages_df"]
+    has_datetime = df["datetime"].notna().any()
+    words, media, links = _text_totals(report["unique_messages"], report["links"])
+
+    return {
+        "total_messages": len(df),
+        "total_words": words,
+        "media_shared": media,
+        "links_shared": links,
+        "first_message": str(df["datetime"].dropna().iloc[0]) if has_datetime else None,
+        "last_message": str(df["datetime"].dropna().iloc[-1]) if has_datetime else None
+    }
+
+
+@incremental_metric("overview")
+def _extend_overview(report, seed, reused, dropped):
+    report["links"]
+    tail = report["messages_df"].iloc[reused:]
+    stamps = tail["datetime"].dropna()
+    if seed["first_message"] is None or stamps.empty:
+        # no dated message on one side: first / last need the whole chat
+        return _overview(report)
+
+    add_message_columns(dropped, ["links"])
+    added = _text_totals(unique_messages(tail["message"]), tail["links"])
+    removed = _text_totals(unique_messages(dropped["message"]), dropped["links"])
+    words, media, links = (
+        seed[name] + new - old
+        for name, new, old in zip(("total_words", "media_shared", "links_shared"), added, removed)
+    )
+    return {
+        "total_messages": reused + len(tail),
+        "total_words": words,
+        "media_shared": media,
+        "links_shared": links,
+        "first_message": seed["first_message"],
+        "last_message": str(stamps.iloc[-1]),
+    }
+
+
+@report_metric("top_senders")
+def _top_senders(report):
+    return list(_busy_users(report["messages_df"]).itertuples(index=False, name=None))
+
+
+@report_metric("user_index")
+def _user_index(report):
+    # link / emoji columns first, so the index is a single pass over them
+    report["links"]
+    report["emojis"]
+    return build_user_index(report["messages_df"], report["rollup"], report["unique_messages"], report["word_counts"])
+
+
+@incremental_metric("user_index")
+def _extend_user_index(report, seed, reused, dropped):
+    report["links"]
+    report["emojis"]
+    add_message_columns(dropped, ["links", "emojis"])
+    tail = report["messages_df"].iloc[reused:]
+    return extend_user_index(seed, tail, dropped, report["rollup"], report["word_counts"])
+
+
+@report_metric("rollup")
+def _rollup(report):
+    return build_rollup(report["messages_df"])
+
+
+@incremental_metric("rollup")
+def _extend_rollup(report, seed, reused, dropped):
+    return extend_rollup(seed, reused, report["messages_df"])
+
+
+@report_metric("rollup_sentiment")
+def _rollup_sentiment(report):
+    # per-cell sentiment sums, aligned with report["rollup"]
+    return report["rollup"].sentiment_sums(report["sentiment"])
+
+
+@report_metric("emoji_analysis")
+def _emoji_analysis(report):
+    return emoji_counter(report["emojis"]).most_common(50)
+
+
+@report_metric("word_counts")
+def _word_counts(report):
+    # {user: Counter} of non-stopwords, plus OVERALL
+    return user_word_counts(report["messages_df"], report["unique_messages"])
+
+
+@report_metric("most_common_words")
+def _most_common_words(report):
+    return report["word_counts"][OVERALL].most_common(100)
+
+
+# Phrase counts ({user: Counter}, plus OVERALL) by metric name
+NGRAM_METRICS = {"bigrams": 2, "trigrams": 3}
+
+
+def _ngram_metric(n):
+    def produce(report):
+        return user_word_counts(report["messages_df"], report["unique_messages"], n)
+    return produce
+
+
+def _extend_word_counts(n):
+    # the earlier counts, plus the new rows', less the re-parsed rows'
+    def produce(report, seed, reused, dropped):
+        tail = report["messages_df"].iloc[reused:]
+        return merge_counts([seed, user_word_counts(tail, n=n)], minus=[user_word_counts(dropped, n=n)])
+    return produce
+
+
+for _name, _n in NGRAM_METRICS.items():
+    report_metric(_name)(_ngram_metric(_n))
+    incremental_metric(_name)(_extend_word_counts(_n))
+incremental_metric("word_counts")(_extend_word_counts(1))
+
+
+@report_metric("wordcloud_image_bytes")
+def _wordcloud_image_bytes(report):
+    return render_wordcloud(report["word_counts"][OVERALL], chat_key=report.key)
+
+
+@report_metric("monthly_timeline")
+def _monthly_timeline(report):
+    return report["rollup"].monthly()
+
+
+@report_metric("daily_timeline")
+def _daily_timeline(report):
+    daily = report["rollup"].daily()
+    return pd.DataFrame({"only_date": daily.index, "count": daily.to_numpy()})
+
+
+@report_metric("most_busy_day")
+def _most_busy_day(report):
+    days = report["rollup"].weekdays().sort_values(ascending=False, kind="stable")
+    return pd.DataFrame({"day": days.index, "count": days.to_numpy()})
+
+
+@report_metric("most_busy_month")
+def _most_busy_month(report):
+    months = report["rollup"].month_names()
+    return pd.DataFrame({"month": months.index, "count": months.to_numpy()})
+
+
+@report_metric("most_busy_users")
+def _most_busy_users(report):
+    return _busy_users(report["messages_df"])
+
+
+@report_metric("sentiment_series")
+def _sentiment_series(report):
+    sentiment = report["sentiment"]
+    df = report["messages_df"]
+    return pd.Series(sentiment.to_numpy(), index=df["datetime"], name="sentiment").dropna()
+
+
+def _busy_users(df):
+    return df["user"].value_counts().reset_index().rename(columns={"count": "messages"})
@@ -0,0 +1,299 @@
+# incremental.py — RE-ANALYZE A NEWER EXPORT OF AN ALREADY ANALYZED CHAT
+#
+# A weekly re-export of a chat is the previous export plus new messages at
+# the end. Every analyzed export is fingerprinted (byte length + hash of its
+# first HEAD_BYTES); when a new upload starts with the exact bytes of a known
+# export, only the lines after that export's last message header are parsed
+# and the per-message feature columns are computed for those rows only. The
+# aggregates the old export's report has computed (word / n-gram counts,
+# rollup cube, per-user index, overview) are carried over and extended by
+# the new rows (see helper.INCREMENTAL_METRICS). The new lines are parsed
+# with the format the old export was parsed with (saved with its
+# fingerprint), so both parts read dates in the same day/month order.
+
+import os
+import re
+import mmap
+import json
+import hashlib
+import threading
+import pandas as pd
+from chat_parser import ChatFormat, parse_stream, settle_format
+from preprocessor import preprocess_line
+from report_cache import HASH_CHUNK_SIZE
+from helper import MESSAGE_COLUMNS, frame_from_columns, add_message_columns, compact_messages
+
+# Bytes hashed to pick candidate prefixes without reading whole files
+HEAD_BYTES = 4096
+
+# Bytes scanned backwards from the end of the old export to find its last
+# message header (doubled until a header is found)
+TAIL_WINDOW = 64 * 1024
+
+FINGERPRINT_FILE = "fingerprints.json"
+
+_fingerprints = {}
+_lock = threading.Lock()
+
+
+# --------------------------------------------------------
+#                BYTE ACCESS
+# --------------------------------------------------------
+class _Bytes:
+    """
+    Random access to the bytes of a str, bytes, path or seekable file-like
+    source. Bytes-like sources (incl. a memory-mapped file) are sliced in
+    place; file-like sources are rewound to where they started on close.
+    """
+
+    def __init__(self, source):
+        self._close = None
+        self.view = None
+        if isinstance(source, str):
+            # same bytes content_hash() sees
+            source = source.encode("utf-8", errors="ignore")
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.view = memoryview(source)
+            self._close = self.view.release
+            self.start, self.size = 0, len(self.view)
+            return
+        if isinstance(source, os.PathLike):
+            self.f = open(source, "rb")
+            self._close = self.f.close
+        elif source.seekable():
+            self.f = source
+            start = source.tell()
+            self._close = lambda: source.seek(start)
+        else:
+            raise ValueError("source is not seekable")
+        self.start = self.f.tell()
+        self.f.seek(0, os.SEEK_END)
+        self.size = self.f.tell() - self.start
+
+    def read(self, offset, size=-1):
+        if self.view is not None:
+            end = self.size if size < 0 else offset + size
+            return bytes(self.view[offset:end])
+        self.f.seek(self.start + offset)
+        return self.f.read(size)
+
+    def reader(self, offset):
+        """
+        A source for iter_lines() / parse_stream() from `offset` on.
+        """
+        if self.view is not None:
+            return self.view[offset:]
+        self.f.seek(self.start + offset)
+        return self.f
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._close is not None:
+            self._close()
+
+
+def _head_digest(data):
+    return hashlib.sha256(data[:HEAD_BYTES]).hexdigest()
+
+
+# --------------------------------------------------------
+#                FINGERPRINT REGISTRY
+# --------------------------------------------------------
+def _registry_path(store_dir):
+    return os.path.join(store_dir, FINGERPRINT_FILE)
+
+
+def _load_registry(store_dir):
+    if not store_dir:
+        return {}
+    try:
+        with open(_registry_path(store_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def fingerprint(source):
+    """
+    {"length", "head"} of an export, or None for unseekable streams.
+    Reads only the first HEAD_BYTES.
+    """
+    try:
+        with _Bytes(source) as data:
+            return {"length": data.size, "head": _head_digest(data.read(0, HEAD_BYTES))}
+    except ValueError:
+        return None
+
+
+def remember(key, entry, store_dir=None, fmt=None):
+    """
+    Record the fingerprint of an analyzed export (in memory, and next to the
+    columnar store when `store_dir` is set) so later exports can extend it,
+    with the ChatFormat `fmt` its messages were parsed with (kept from an
+    earlier record when None, e.g. for a frame loaded from the store).
+    """
+    if entry is None:
+        return
+
+    with _lock:
+        registry = _load_registry(store_dir) if store_dir else {}
+        entry = dict(entry)
+        if fmt is not None:
+            entry["format"] = _format_record(fmt)
+        else:
+            known = _fingerprints.get(key) or registry.get(key) or {}
+            if "format" in known:
+                entry["format"] = known["format"]
+
+        _fingerprints[key] = entry
+        if store_dir:
+            registry[key] = entry
+            os.makedirs(store_dir, exist_ok=True)
+            tmp = _registry_path(store_dir) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(registry, f)
+            os.replace(tmp, _registry_path(store_dir))
+
+
+def find_prefix(source, store_dir=None):
+    """
+    Key of the longest known export whose bytes are a strict prefix of
+    `source`, or None. One hashing pass over the new export, stopping at the
+    longest candidate.
+    """
+    with _lock:
+        known = dict(_load_registry(store_dir))
+        known.update(_fingerprints)
+
+    try:
+        with _Bytes(source) as data:
+            head = data.read(0, HEAD_BYTES)
+            candidates = {}
+            for key, entry in known.items():
+                length = entry["length"]
+                if 0 < length < data.size and _head_digest(head[:length]) == entry["head"]:
+                    candidates.setdefault(length, []).append(key)
+            if not candidates:
+                return None
+
+            # content_hash() of the first `length` bytes is the old key
+            h = hashlib.sha256()
+            best, pos = None, 0
+            for length in sorted(candidates):
+                while pos < length:
+                    chunk = data.read(pos, min(HASH_CHUNK_SIZE, length - pos))
+                    if not chunk:
+                        return best
+                    h.update(chunk)
+                    pos += len(chunk)
+                digest = h.hexdigest()
+                if digest in candidates[length]:
+                    best = digest
+            return best
+    except ValueError:
+        return None
+
+
+# --------------------------------------------------------
+#                EXTEND A PARSED CHAT
+# --------------------------------------------------------
+def _last_header_offset(data, end, pattern):
+    """
+    Byte offset of the last line before `end` that starts a message.
+    """
+    window = TAIL_WINDOW
+    while True:
+        lo = max(0, end - window)
+        lines = data.read(lo, end - lo).split(b"\n")
+        offsets = [lo]
+        for line in lines[:-1]:
+            offsets.append(offsets[-1] + len(line) + 1)
+        # the first piece may start mid-line unless the window reaches byte 0
+        first = 0 if lo == 0 else 1
+        for k in range(len(lines) - 1, first - 1, -1):
+            if pattern.match(preprocess_line(lines[k].decode("utf-8", errors="ignore"))):
+                return offsets[k]
+        if lo == 0:
+            return None
+        window *= 2
+
+
+def _same_message(row, base_row):
+    same_time = row["datetime"] == base_row["datetime"] or (
+        pd.isna(row["datetime"]) and pd.isna(base_row["datetime"])
+    )
+    return same_time and row["user"] == base_row["user"] and str(row["message"]).startswith(str(base_row["message"]))
+
+
+def extend_messages(source, base, base_length, fmt):
+    """
+    (messages frame, ChatFormat) of `source`, given the frame `base` parsed
+    from its first `base_length` bytes with `fmt`. The last base message is
+    re-parsed (the new export may continue it); earlier rows, including
+    their sentiment / link / emoji columns, are reused. Returns (None, None)
+    if the tail does not line up with the base, or if its dates settle a
+    day/month order the base was not read in; the caller should then parse
+    the whole export.
+    """
+    if base is None or not len(base) or fmt is None:
+        return None, None
+
+    try:
+        with _Bytes(source) as data:
+            offset = _last_header_offset(data, base_length, fmt.pattern)
+            if offset is None:
+                return None, None
+            columns, _ = parse_stream(data.reader(offset), fmt=fmt)
+    except ValueError:
+        return None, None
+
+    if not columns["message"]:
+        return None, None
+    # a base whose dates read both ways was parsed in the detected order;
+    # the tail may show it was the other one
+    settled = settle_format(columns["date"], fmt)
+    if settled.datetime_format != fmt.datetime_format:
+        return None, None
+    tail = frame_from_columns(columns, settled)
+    if not _same_message(tail.iloc[0], base.iloc[-1]):
+        return None, None
+
+    add_message_columns(tail, [name for name in MESSAGE_COLUMNS if name in base.columns])
+    tail = tail.reindex(columns=base.columns)
+    # categories differ between the two parts; re-compact the merged frame
+    return compact_messages(pd.concat([base.iloc[:-1], tail], ignore_index=True)), settled
+
+
+def fingerprint_length(key, store_dir=None):
+    """
+    Byte length of a remembered export, or None.
+    """
+    entry = _entry(key, store_dir)
+    return entry["length"] if entry else None
+
+
+def fingerprint_format(key, store_dir=None):
+    """
+    ChatFormat a remembered export was parsed with, or None.
+    """
+    entry = _entry(key, store_dir)
+    if not entry or "format" not in entry:
+        return None
+    record = entry["format"]
+    return ChatFormat(record["name"], re.compile(record["pattern"]), record["datetime_format"],
+                      record["alt_datetime_format"])
+
+
+def _entry(key, store_dir):
+    with _lock:
+        return _fingerprints.get(key) or _load_registry(store_dir).get(key)
+
+
+def _format_record(fmt):
+    # JSON-able form of a ChatFormat
+    return {
+        "name": fmt.name, "pattern": fmt.pattern.pattern,
+        "datetime_format": fmt.datetime_format, "alt_datetime_format": fmt.alt_datetime_format,
+    }
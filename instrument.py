@@ -0,0 +1,143 @@
+# instrument.py — PER-STAGE TIMINGS + ONE-SHOT PROFILER DUMPS
+#
+# Stages append {"stage", "seconds", "rows", "peak_mb"} records to a plain
+# list (report["timings"]); counters (e.g. the dedup ratio) append
+# {"counter", "value"} records to the same list. Timing costs two perf_counter() calls per stage;
+# peak memory is only recorded while tracemalloc is tracing (a profiled run,
+# or CHAT_TRACE_MEMORY=1), so nothing is traced when instrumentation is off.
+
+import os
+import time
+import tempfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Trace allocations for every analysis (slow; for debugging only)
+TRACE_MEMORY = os.environ.get("CHAT_TRACE_MEMORY") == "1"
+
+# Where profiler dumps are written
+PROFILE_DIR = os.environ.get("CHAT_PROFILE_DIR") or tempfile.gettempdir()
+
+PROFILE_MODES = ("cProfile", "tracemalloc")
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+# Peaks of enclosing stages (reset_peak() in a nested stage would lose them)
+_open_peaks = threading.local()
+
+
+@contextmanager
+def timed(timings, stage, rows=None):
+    """
+    Record the wall time (and tracemalloc peak, if tracing) of the block as
+    one entry of `timings`. `rows` may be an int or a zero-argument callable
+    evaluated after the block (for stages that only know their size then;
+    skipped if the block raised). A `timings` of None makes this a no-op.
+    """
+    if timings is None:
+        yield
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        stack = _open_peaks.__dict__.setdefault("stack", [])
+        if stack:
+            stack[-1] = max(stack[-1], tracemalloc.get_traced_memory()[1])
+        stack.append(0)
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        seconds = time.perf_counter() - start
+        peak = None
+        if tracing:
+            peak = max(stack.pop(), tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+        timings.append({
+            "stage": stage,
+            "seconds": seconds,
+            # a failed block may not have produced what `rows` counts
+            "rows": (rows() if completed else None) if callable(rows) else rows,
+            "peak_mb": peak / 1024 / 1024 if tracing else None,
+        })
+
+
+def count(timings, name, value):
+    """
+    Record counter `name` (a number describing the run, not a stage) in
+    `timings`. A `timings` of None makes this a no-op.
+    """
+    if timings is not None:
+        timings.append({"counter": name, "value": value})
+
+
+def counters(timings):
+    """
+    {name: value} of the counters in `timings` (the last value wins).
+    """
+    return {t["counter"]: t["value"] for t in timings or () if "counter" in t}
+
+
+def summarize_timings(timings):
+    """
+    Stage timings (counters left out) as a DataFrame with rows/s, for
+    display.
+    """
+    import pandas as pd
+
+    stages = [t for t in timings if "stage" in t]
+    df = pd.DataFrame(stages, columns=["stage", "seconds", "rows", "peak_mb"])
+    df["rows_per_s"] = (df["rows"] / df["seconds"]).where(df["seconds"] > 0)
+    return df
+
+
+# --------------------------------------------------------
+#                PROFILER DUMPS
+# --------------------------------------------------------
+@contextmanager
+def profiled(mode, label="analysis", out_dir=PROFILE_DIR):
+    """
+    Run the block under cProfile or tracemalloc and dump the result to a file
+    in `out_dir`. Yields a dict whose "path" is set once the dump is written.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"unknown profile mode: {mode}")
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    os.makedirs(out_dir, exist_ok=True)
+    result = {"mode": mode, "path": None}
+
+    if mode == "cProfile":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            path = os.path.join(out_dir, f"{label}-{stamp}.prof")
+            profiler.dump_stats(path)
+            result["path"] = path
+        return
+
+    # already tracing (CHAT_TRACE_MEMORY): snapshot without stopping it
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(25)
+    try:
+        yield result
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+        path = os.path.join(out_dir, f"{label}-{stamp}.tracemalloc")
+        snapshot.dump(path)
+        result["path"] = path
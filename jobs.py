@@ -0,0 +1,170 @@
+# jobs.py — BACKGROUND ANALYSIS JOBS (PROGRESS, PARTIAL RESULTS, CANCEL)
+#
+# An AnalysisJob parses a chat on a worker thread, publishes the (lazy)
+# report as soon as the messages are parsed, then computes JOB_METRICS one
+# by one, cheap ones first, so a page can show the overview and timelines
+# while sentiment is still running. Progress is the current stage plus the
+# lines parsed so far. Cancelling is cooperative: it takes effect at the
+# next progress callback of the parser or before the next metric.
+# Optionally a Preview (estimates from a sample, see preview.py) is built
+# before parsing, for pages to draw while the exact results are computed.
+# No Streamlit here; chat_session.py polls the job from the pages.
+
+import time
+import threading
+
+# Computed in this order after parsing (per-user stats feed the overview
+# and timelines on the Analysis page; sentiment is the slow one)
+JOB_METRICS = (
+    "overview", "rollup", "user_index", "daily_timeline", "monthly_timeline",
+    "most_busy_users", "sentiment", "rollup_sentiment", "emoji_analysis", "most_common_words",
+)
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job's thread to stop it.
+    """
+
+
+class AnalysisJob:
+    """
+    Analysis of one chat on a daemon thread. `analyze(source, key,
+    progress=fn)` must return a LazyReport or an {"error": ...} dict;
+    `on_done(job)` runs on the worker thread once every metric is computed.
+    `preview(source)`, if given, returns a Preview (or None) first.
+    Read `stage`, `lines`, `preview`, `report` (None until parsed), `error`,
+    `version` (bumped whenever new results are available) from any thread.
+    """
+
+    def __init__(self, key, source, analyze=None, metrics=JOB_METRICS, on_done=None, preview=None):
+        if analyze is None:
+            from chat_store import analyze_stored as analyze
+
+        self.key = key
+        self.metrics = tuple(metrics)
+        self.stage = "queued"
+        self.lines = 0
+        self.preview = None
+        self.report = None
+        self.error = None
+        self.completed = []
+        self.version = 0
+        self.started = None
+        self.finished = None
+
+        self._source = source
+        self._analyze = analyze
+        self._on_done = on_done
+        self._preview = preview
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"analysis-{key[:12]}", daemon=True)
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Block until the job has finished (or `timeout` seconds passed);
+        returns whether it has.
+        """
+        return self._done.wait(timeout)
+
+    @property
+    def fraction(self):
+        """
+        Share of the job's steps (parse + each metric) done, in [0, 1].
+        """
+        if self.done:
+            return 1.0
+        parsed = self.report is not None
+        return (parsed + len(self.completed)) / (1 + len(self.metrics))
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def status(self):
+        """
+        One-line progress text.
+        """
+        if self.error:
+            return f"Failed: {self.error}"
+        if self.cancelled:
+            return "Cancelled"
+        if self.done:
+            return f"Done in {self.elapsed:.1f} s"
+        if self.stage == "preview":
+            return f"Sampling the chat… ({self.elapsed:.0f} s)"
+        if self.report is None:
+            return f"Parsing… {self.lines:,} lines ({self.elapsed:.0f} s)"
+        return f"Computing {self.stage.replace('_', ' ')}… ({self.elapsed:.0f} s)"
+
+    # ----------------------------------------------------
+    def _progress(self, lines):
+        self.lines = lines
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def _run(self):
+        try:
+            if self._preview is not None:
+                self.stage = "preview"
+                try:
+                    self.preview = self._preview(self._source)
+                except Exception:
+                    # only a head start: the analysis below reports a bad export
+                    self.preview = None
+                self.version += 1
+
+            self.stage = "parse"
+            report = self._analyze(self._source, self.key, progress=self._progress)
+            if "error" in report:
+                self.error = report["error"]
+                return
+            self.report = report
+            self.version += 1
+
+            for name in self.metrics:
+                if self._cancel.is_set():
+                    raise JobCancelled()
+                self.stage = name
+                report[name]
+                self.completed.append(name)
+                self.version += 1
+
+            self.stage = "done"
+            if self._on_done is not None:
+                self._on_done(self)
+        except JobCancelled:
+            self.stage = "cancelled"
+        except Exception as exc:
+            self.error = f"Analysis failed: {type(exc).__name__}: {exc}"
+        finally:
+            self._source = None   # release the upload
+            self.finished = time.monotonic()
+            self.version += 1
+            self._done.set()
+
+
+def start_job(key, source, analyze=None, metrics=JOB_METRICS, on_done=None, preview=None):
+    """
+    Start analysing `source` in the background; returns the AnalysisJob.
+    """
+    return AnalysisJob(key, source, analyze, metrics, on_done, preview).start()
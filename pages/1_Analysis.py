@@ -1,93 +1,87 @@
 # pages/1_Analysis.py
 
-import nltk
-nltk.data.path.append(r"C:\Users\Arjun\PycharmProjects\whatsappchat\nltk_data")
-
-import re
 import streamlit as st
 import pandas as pd
-from helper import analyze_text, summarize_text, export_report_pdf
-from wordcloud import WordCloud
-from collections import Counter
-import emoji
-from urlextract import URLExtract
-from pathlib import Path
+from helper import summarize_messages, export_report_pdf
+from user_index import OVERALL
+from chat_session import load_report, metric_ready, performance_panel
+from wordclouds import render_wordcloud
+from pdf_report import SECTIONS
 
 st.title("📊 Chat Analysis")
 
-# -------------------- UPLOAD --------------------
-uploaded = st.file_uploader("📂 Upload  Chat (.txt)", type=["txt"])
+# -------------------- PREVIEW --------------------
+def show_preview(preview):
+    # estimates drawn while a large chat is still being analyzed
+    overview = preview.overview()
+    st.header("Overview — estimate")
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Messages", f"≈ {overview['total_messages']:,}")
+    col2.metric("Total Words", f"≈ {overview['total_words']:,}")
+    col3.metric("Media Shared", f"≈ {overview['media_shared']:,}")
+    col4.metric("Links Shared", f"≈ {overview['links_shared']:,}")
 
-if not uploaded:
-    st.info("Upload a exported .txt file (Menu → Export chat → Without media).")
-    st.stop()
+    st.subheader("🏆 Top Senders (≈)")
+    st.table(pd.DataFrame(preview.top_senders(20), columns=["User", "Messages"]))
 
-raw = uploaded.read().decode("utf-8", errors="ignore")
+    st.subheader("🔤 Most Common Words (≈)")
+    st.table(pd.DataFrame(preview.most_common_words(25), columns=["Word", "Count"]))
 
-with st.spinner("Analyzing chat..."):
-    report = analyze_text(raw)
+    st.subheader("😀 Emoji Analysis (≈)")
+    st.table(preview.emoji_analysis(30))
 
-if "error" in report:
-    st.error(report["error"])
-    st.stop()
 
-df_full = report["messages_df"].copy()
+# -------------------- UPLOAD --------------------
+report = load_report(
+    "📂 Upload  Chat (.txt or .zip)",
+    "Upload an exported chat: the .txt or the .zip as exported (Menu → Export chat).",
+    spinner="Analyzing chat...",
+    preview=show_preview,
+)
+# page-local copy: the cached report is shared with other pages and sessions
+report = report.copy()
+metric_ready(report, "user_index", "Per-user statistics", preview=show_preview)
+
+# per-user totals, counters and timelines, built once per chat
+user_index = report["user_index"]
+df_full = report["messages_df"]
 
 # -------------------- USER FILTER --------------------
-user_list = sorted(df_full["user"].dropna().unique().tolist())
-user_list.insert(0, "Overall")
+user_list = sorted(u for u in user_index if u != OVERALL)
+user_list.insert(0, OVERALL)
 
 selected_user = st.sidebar.selectbox("Select user", user_list)
+stats = user_index[selected_user]
 
-df = df_full if selected_user == "Overall" else df_full[df_full["user"] == selected_user]
+df = df_full if selected_user == OVERALL else df_full[df_full["user"] == selected_user]
 
 # -------------------- QUICK STATS --------------------
 st.header(f"Overview — {selected_user}")
 
 col1, col2, col3, col4 = st.columns(4)
 
-col1.metric("Messages", df.shape[0])
-
-col2.metric(
-    "Total Words",
-    sum(len(str(m).split()) for m in df["message"])
-)
-
-col3.metric(
-    "Media Shared",
-    df["message"].astype(str).str.contains("Media omitted", case=False).sum()
-)
-
-extractor = URLExtract()
-col4.metric(
-    "Links Shared",
-    sum(len(extractor.find_urls(str(m))) for m in df["message"])
-)
+col1.metric("Messages", stats.messages)
+col2.metric("Total Words", stats.words)
+col3.metric("Media Shared", stats.media)
+col4.metric("Links Shared", stats.links)
 
 st.divider()
 
 # -------------------- DAILY TIMELINE --------------------
-if df["datetime"].notna().any():
+if len(stats.daily):
     st.subheader("📅 Daily Timeline")
-    daily = df.groupby(df["datetime"].dt.date).size().reset_index(name="messages")
-    daily = daily.rename(columns={"datetime": "date"})
-    st.line_chart(daily.set_index("date"))
+    st.line_chart(stats.daily.to_frame())
 
 # -------------------- MONTHLY TIMELINE --------------------
 st.subheader("📆 Monthly Timeline")
 
-df = df.copy()
-df.loc[:, "month_name"] = df["datetime"].dt.month_name()
-
-monthly = df["month_name"].value_counts().reset_index()
-monthly.columns = ["month", "messages"]
-
-st.bar_chart(monthly.set_index("month"))
+st.bar_chart(stats.monthly.to_frame())
 
 st.divider()
 
 # -------------------- TOP SENDERS --------------------
-if selected_user == "Overall":
+if selected_user == OVERALL:
     st.subheader("🏆 Top Senders")
     st.table(pd.DataFrame(report["top_senders"], columns=["User", "Messages"]).head(20))
 
@@ -96,39 +90,40 @@ st.divider()
 # -------------------- WORDCLOUD --------------------
 st.subheader("🌥 Word Cloud")
 
-text_blob = " ".join(df["message"].astype(str).tolist()).strip()
-
-if text_blob:
-    try:
-        wc = WordCloud(width=900, height=450, background_color="white").generate(text_blob)
-        st.image(wc.to_array(), width="stretch")
-    except Exception:
-        st.warning("WordCloud could not be generated.")
+# drawn from the user's word counts; renders are cached per chat / user / size
+try:
+    png = render_wordcloud(stats.word_counts, 900, 450, chat_key=report.key, user=selected_user)
+except Exception:
+    st.warning("WordCloud could not be generated.")
 else:
-    st.warning("No text available for WordCloud.")
+    if png:
+        st.image(png, width="stretch")
+    else:
+        st.warning("No text available for WordCloud.")
 
 st.divider()
 
 # -------------------- MOST COMMON WORDS --------------------
 st.subheader("🔤 Most Common Words")
 
-words = []
-for msg in df["message"].astype(str):
-    words.extend(re.findall(r"\b[a-zA-Z]{2,}\b", msg.lower()))
-
-common = Counter(words).most_common(25)
-st.table(common)
+# stopwords (English + Hinglish) are left out; phrases are counted on demand
+phrase = st.radio("Count", ["Words", "Two-word phrases", "Three-word phrases"], horizontal=True)
+if phrase == "Words":
+    counts = stats.word_counts
+else:
+    counts = report["bigrams" if phrase == "Two-word phrases" else "trigrams"][selected_user]
+common = counts.most_common(25)
+if common:
+    st.table(pd.DataFrame(common, columns=["Word" if phrase == "Words" else "Phrase", "Count"]))
+else:
+    st.info("No words left after removing stopwords.")
 
 st.divider()
 
 # -------------------- EMOJI ANALYSIS --------------------
 st.subheader("😀 Emoji Analysis")
 
-emojis = []
-for msg in df["message"].astype(str):
-    emojis.extend([c for c in msg if c in emoji.EMOJI_DATA])
-
-emoji_counts = Counter(emojis).most_common(30)
+emoji_counts = stats.emoji_counts.most_common(30)
 st.table(emoji_counts)
 
 st.divider()
@@ -140,23 +135,30 @@ c1, c2 = st.columns(2)
 
 with c1:
     summary_len = st.slider("Summary length (sentences)", 2, 10, 4)
+    summary_by = st.selectbox("Summarize", ["Whole chat", "Per user", "Per day"])
 
     if st.button("Generate Summary"):
-        text_blob = " ".join(df["message"].astype(str).tolist())
-        summary = summarize_text(text_blob, max_sentences=summary_len)
-        report["summary"] = summary
-        st.success("Summary generated!")
-        st.write(summary)
+        if summary_by == "Whole chat":
+            summary = summarize_messages(df["message"], max_sentences=summary_len, timings=report["timings"])
+            report["summary"] = summary
+            st.success("Summary generated!")
+            st.write(summary)
+        else:
+            by = df["user"] if summary_by == "Per user" else df["only_date"].dt.date
+            summaries = summarize_messages(df["message"], max_sentences=summary_len, by=by, timings=report["timings"])
+            st.success(f"{len(summaries)} summaries generated!")
+            for group, summary in summaries.items():
+                with st.expander(str(group)):
+                    st.write(summary)
 
 with c2:
+    extra_sections = st.multiselect("Extra PDF sections", SECTIONS)
+
     if st.button("Export PDF Report"):
         if "summary" not in report:
-            report["summary"] = summarize_text(" ".join(df["message"].astype(str).tolist()), max_sentences=4)
-
-        pdf_path = export_report_pdf(report, selected_user)
+            report["summary"] = summarize_messages(df["message"], max_sentences=4, timings=report["timings"])
 
-        with open(pdf_path, "rb") as f:
-            data = f.read()
+        data = export_report_pdf(report, selected_user, sections=extra_sections)
 
         st.download_button(
             "📥 Download PDF",
@@ -165,4 +167,4 @@ with c2:
             mime="application/pdf"
         )
 
-        Path(pdf_path).unlink(missing_ok=True)
+performance_panel(report)
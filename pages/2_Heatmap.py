@@ -1,72 +1,68 @@
 # pages/2_Heatmap.py
 
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
-from helper import analyze_text
-import pandas as pd
+from chat_session import load_report, metric_ready, performance_panel
+from user_index import OVERALL
 
 st.title("📈 Activity Heatmap")
 
-# -------------------- UPLOAD --------------------
-uploaded = st.file_uploader("📂 Upload  chat (.txt)", type=["txt"])
+# -------------------- PLOT --------------------
+def draw_heatmap(heat):
+    # plotting libraries load only once there is a heatmap to draw
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(14, 5))
+
+    sns.heatmap(
+        heat,
+        cmap="PuBuGn",
+        linewidths=0.5,
+        linecolor="white",
+        cbar_kws={"label": "Message Count"},
+        ax=ax
+    )
 
-if not uploaded:
-    st.info("Upload exported chat (.txt) to generate heatmap.")
-    st.stop()
+    ax.set_xlabel("Hour of Day (0–23)")
+    ax.set_ylabel("Day of Week")
 
-raw = uploaded.read().decode("utf-8", errors="ignore")
+    st.pyplot(fig)
 
-with st.spinner("Processing chat..."):
-    report = analyze_text(raw)
 
-if "error" in report:
-    st.error(report["error"])
-    st.stop()
+def show_preview(preview):
+    # estimated from a sample while a large chat is still being analyzed
+    st.subheader("🗓 Weekly Activity Heatmap (estimate)")
+    draw_heatmap(preview.heatmap())
+
+
+# -------------------- UPLOAD --------------------
+report = load_report(
+    "📂 Upload  chat (.txt or .zip)",
+    "Upload exported chat (.txt or .zip) to generate heatmap.",
+    spinner="Processing chat...",
+    preview=show_preview,
+)
 
-df = report["messages_df"].copy()
+# the job's preview is shown until the rollup cube is built
+metric_ready(report, "rollup", "The activity heatmap", preview=show_preview)
+cube = report["rollup"]
 
 # -------------------- CHECK DATETIME --------------------
-if not df["datetime"].notna().any():
+if not len(cube):
     st.warning("⚠ Datetime could not be extracted. Heatmap unavailable for this chat.")
     st.stop()
 
-# Ensure required columns exist
-df["day_name"] = df["datetime"].dt.day_name()
-df["hour"] = df["datetime"].dt.hour
+# -------------------- USER FILTER --------------------
+selected_user = st.sidebar.selectbox("Select user", [OVERALL] + sorted(cube.users))
 
 # -------------------- HEATMAP DATA --------------------
-heat = (
-    df.pivot_table(
-        index="day_name",
-        columns="hour",
-        values="message",
-        aggfunc="count",
-        fill_value=0
-    )
-)
-
-# Reorder weekdays consistently
-weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-heat = heat.reindex(weekday_order)
+# weekday x hour counts from the chat's rollup cube (Monday first)
+heat = cube.heatmap(None if selected_user == OVERALL else selected_user)
 
 st.subheader("🗓 Weekly Activity Heatmap")
 
-# -------------------- PLOT --------------------
-fig, ax = plt.subplots(figsize=(14, 5))
-
-sns.heatmap(
-    heat,
-    cmap="PuBuGn",
-    linewidths=0.5,
-    linecolor="white",
-    cbar_kws={"label": "Message Count"},
-    ax=ax
-)
-
-ax.set_xlabel("Hour of Day (0–23)")
-ax.set_ylabel("Day of Week")
-
-st.pyplot(fig)
+draw_heatmap(heat)
 
 st.success("Heatmap generated successfully!")
+
+performance_panel(report)
@@ -1,40 +1,46 @@
 # pages/3_Sentiment_Analysis.py
 
 import streamlit as st
-import pandas as pd
-from helper import analyze_text
+from chat_session import load_report, metric_ready, performance_panel
+from user_index import OVERALL
 
 st.title("💟 Sentiment Analysis")
 
 # -------------------- Upload Section --------------------
-uploaded = st.file_uploader("📂 Upload  chat (.txt)", type=["txt"])
-if not uploaded:
-    st.info("Upload exported chat (.txt) to analyze sentiment.")
-    st.stop()
-
-raw = uploaded.read().decode("utf-8", errors="ignore")
-
-with st.spinner("Analyzing chat for sentiment..."):
-    report = analyze_text(raw)
+report = load_report(
+    "📂 Upload  chat (.txt or .zip)",
+    "Upload exported chat (.txt or .zip) to analyze sentiment.",
+    spinner="Analyzing chat for sentiment...",
+)
 
-if "error" in report:
-    st.error(report["error"])
-    st.stop()
+# computed lazily (or by the background analysis job, shown as it runs):
+# only the first visit for a chat pays for scoring
+metric_ready(report, "sentiment", "Sentiment")
+with st.spinner("Scoring sentiment..."):
+    report["sentiment"]
 
-df = report["messages_df"].copy()
+df = report["messages_df"]
 
 # -------------------- Check if sentiment exists --------------------
 if "sentiment" not in df.columns:
     st.warning("⚠ Sentiment scores missing — analysis unavailable.")
     st.stop()
 
-# Replace NaN sentiment values
-df["sentiment"] = df["sentiment"].fillna(0)
+cube = report["rollup"]
+
+# -------------------- USER FILTER --------------------
+selected_user = st.sidebar.selectbox("Select user", [OVERALL] + sorted(cube.users))
+user = None if selected_user == OVERALL else selected_user
+
+# Replace NaN sentiment values (a Series, not a copy of the whole frame)
+sentiment = df["sentiment"].fillna(0)
+if user is not None:
+    sentiment = sentiment[(df["user"] == user).to_numpy()]
 
 # -------------------- Average sentiment --------------------
-st.subheader("💬 Overall Chat Sentiment")
+st.subheader(f"💬 Overall Chat Sentiment — {selected_user}")
 
-avg_sent = df["sentiment"].mean()
+avg_sent = sentiment.mean() if len(sentiment) else 0.0
 sent_label = (
     "😊 Positive" if avg_sent > 0.1 else
     "😐 Neutral" if -0.1 <= avg_sent <= 0.1 else
@@ -47,18 +53,15 @@ st.write(f"Overall sentiment: **{sent_label}**")
 st.divider()
 
 # -------------------- Sentiment Over Time --------------------
-if df["datetime"].notna().any():
+if len(cube):
     st.subheader("📈 Sentiment Over Time")
 
-    df_plot = (
-        df.dropna(subset=["datetime"])
-          .set_index("datetime")
-          .resample("D")["sentiment"]
-          .mean()
-          .fillna(0)
-    )
+    # daily means from the rollup cube's per-cell sentiment sums
+    df_plot = cube.daily_sentiment(report["rollup_sentiment"], user)
 
     st.line_chart(df_plot)
 
 else:
     st.warning("⚠ Datetime parsing failed — sentiment timeline unavailable.")
+
+performance_panel(report)
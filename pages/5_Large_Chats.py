@@ -0,0 +1,117 @@
+# pages/5_Large_Chats.py
+
+import streamlit as st
+import pandas as pd
+from chat_source import ExportError
+from chat_session import upload_key
+from sketches import sketch_chat
+
+st.title("🗄 Large Chats (approximate)")
+st.write(
+    "For chats too large for the full analysis: the export is read in batches and "
+    "summarized in fixed-size sketches, so memory stays the same however long the chat is. "
+    "Totals and timelines are exact; top lists and distinct counts are estimates "
+    "within the error bounds shown below."
+)
+
+# -------------------- UPLOAD --------------------
+uploaded = st.file_uploader("📂 Upload  chat (.txt or .zip)", type=["txt", "zip"])
+
+if uploaded:
+    try:
+        key = upload_key(uploaded)
+    except ExportError as exc:
+        st.error(str(exc))
+        st.stop()
+
+    if st.session_state.get("sketch_key") != key:
+        status = st.empty()
+
+        def show_progress(lines):
+            status.caption(f"Reading… {lines:,} lines")
+
+        try:
+            # the upload is streamed in batches (a .zip from its chat member), not copied
+            sketch = sketch_chat(uploaded, progress=show_progress)
+        except ExportError as exc:
+            st.error(str(exc))
+            st.stop()
+        status.empty()
+        st.session_state["sketch_key"] = key
+        st.session_state["sketch"] = sketch
+
+sketch = st.session_state.get("sketch")
+if sketch is None:
+    st.info("Upload an exported chat (.txt or .zip) to summarize it.")
+    st.stop()
+
+if not sketch.messages:
+    st.error("Invalid or empty chat file.")
+    st.stop()
+
+# -------------------- OVERVIEW --------------------
+st.header("Overview")
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Messages", f"{sketch.messages:,}")
+col2.metric("Total Words", f"{sketch.words:,}")
+col3.metric("Media Shared", f"{sketch.media:,}")
+col4.metric("Links Shared", f"{sketch.links:,}")
+
+col1, col2 = st.columns(2)
+col1.metric("Active Users", f"≈ {sketch.users.count():,}")
+col2.metric("Distinct Words", f"≈ {sketch.distinct_words.count():,}")
+
+if sketch.first is not None:
+    st.caption(f"From {sketch.first} to {sketch.last}")
+
+st.divider()
+
+# -------------------- TIMELINES --------------------
+daily = sketch.timeline.daily()
+if len(daily):
+    st.subheader("📅 Daily Timeline")
+    st.line_chart(daily.to_frame())
+
+    st.subheader("📆 Monthly Timeline")
+    monthly = sketch.timeline.monthly()
+    monthly["period"] = monthly["month"].astype(str) + " " + monthly["year"].astype(str)
+    st.bar_chart(monthly.set_index("period")["count"], sort=False)
+
+    st.subheader("🗓 Weekly Activity")
+    st.dataframe(sketch.timeline.heatmap())
+
+st.divider()
+
+# -------------------- TOP LISTS --------------------
+def top_table(sketch_part, label, n=25):
+    # estimates with the count-min bound: true count in [estimate - bound, estimate]
+    rows = sketch_part.most_common(n)
+    bound = int(sketch_part.error)
+    return pd.DataFrame({
+        label: [item for item, _ in rows],
+        "Count (≈)": [est for _, est in rows],
+        "At least": [max(est - bound, 0) for _, est in rows],
+    })
+
+
+st.subheader("💬 Top Senders")
+st.dataframe(top_table(sketch.top_senders, "User"), hide_index=True)
+
+st.subheader("🔠 Most Common Words")
+st.dataframe(top_table(sketch.top_words, "Word"), hide_index=True)
+
+st.subheader("😊 Emoji Analysis")
+emoji = top_table(sketch.top_emoji, "Emoji")
+if emoji.empty:
+    st.info("No emojis found.")
+else:
+    st.dataframe(emoji, hide_index=True)
+
+# -------------------- ERROR BOUNDS --------------------
+with st.expander("📏 Error bounds"):
+    st.table(pd.DataFrame(list(sketch.error_bounds().items()), columns=["Statistic", "Accuracy"]))
+    st.caption(
+        f"Sketch size: {sketch.nbytes / 1e6:.1f} MB, independent of the chat's length "
+        "(the timeline grows with its date span only)."
+    )
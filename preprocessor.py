@@ -1,11 +1,23 @@
 # preprocessor.py
 def preprocess(text):
     """
-    Minimal cleaning: remove BOM / narrow spaces and trim.
+    Minimal cleaning: remove BOM / direction marks / narrow spaces and trim.
     Return a plain string (not DataFrame).
     """
     if not isinstance(text, str):
         text = str(text)
     text = text.replace("\u202f", " ")
     text = text.replace("\ufeff", "")
+    # iOS puts a left-to-right mark before media / system lines and texts
+    text = text.replace("\u200e", "").replace("\u200f", "")
     return text.strip()
+
+
+def preprocess_line(line):
+    """
+    Same cleaning as preprocess(), applied to a single line while streaming.
+    """
+    return (
+        line.replace("\u202f", " ").replace("\ufeff", "")
+        .replace("\u200e", "").replace("\u200f", "").strip()
+    )
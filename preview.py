@@ -0,0 +1,137 @@
+# preview.py — QUICK ESTIMATES FROM A STRIDE SAMPLE (FIRST PAINT OF A BIG CHAT)
+#
+# build_preview() reads PREVIEW_WINDOWS evenly spaced windows of a chat's
+# text (PREVIEW_BYTES in total, first and last window at the two ends), keeps
+# the whole lines of each, and folds their messages into a ChatSketch (see
+# sketches.py). Counts are scaled by the sampled share of the text, so the
+# overview, heatmap and top lists are estimates of the whole chat within
+# about a second, while the full analysis is still parsing. Messages are
+# never glued across windows; a message cut at a window's end loses its
+# continuation lines only.
+
+import os
+import mmap
+import numpy as np
+from chat_parser import FORMAT_SAMPLE_LINES, detect_format, iter_messages, parse_datetimes_settled
+from chat_source import open_chat
+from preprocessor import preprocess_line
+from sketches import ChatSketch
+
+# Text read for a preview, spread over this many windows (many short
+# windows sample the hours and weekdays more evenly than a few long ones)
+PREVIEW_BYTES = int(os.environ.get("CHAT_PREVIEW_BYTES", str(2 << 20)))
+PREVIEW_WINDOWS = 1024
+
+# Chats smaller than this are analyzed exactly about as fast: no preview
+PREVIEW_MIN_BYTES = int(os.environ.get("CHAT_PREVIEW_MIN_MB", "8")) * 1024 * 1024
+
+
+class Preview:
+    """
+    Estimates for a whole chat from the ChatSketch of a sample holding
+    `fraction` of its text.
+    """
+
+    def __init__(self, sketch, fraction):
+        self.sketch = sketch
+        self.fraction = fraction
+
+    def _scaled(self, value):
+        return int(round(value / self.fraction))
+
+    def overview(self):
+        """
+        Estimated overview totals (keys as the report's "overview").
+        """
+        sketch = self.sketch
+        return {
+            "total_messages": self._scaled(sketch.messages),
+            "total_words": self._scaled(sketch.words),
+            "media_shared": self._scaled(sketch.media),
+            "links_shared": self._scaled(sketch.links),
+            "first_message": None if sketch.first is None else str(sketch.first),
+            "last_message": None if sketch.last is None else str(sketch.last),
+        }
+
+    def heatmap(self):
+        """
+        Estimated weekday x hour message counts (as RollupCube.heatmap()).
+        """
+        return (self.sketch.timeline.heatmap() / self.fraction).round().astype(np.int64)
+
+    def _top(self, part, n):
+        return [(item, self._scaled(count)) for item, count in part.most_common(n)]
+
+    def top_senders(self, n=20):
+        return self._top(self.sketch.top_senders, n)
+
+    def most_common_words(self, n=25):
+        return self._top(self.sketch.top_words, n)
+
+    def emoji_analysis(self, n=30):
+        return self._top(self.sketch.top_emoji, n)
+
+
+def _windows(chat, windows, size, minimum):
+    # (raw windows, total length) evenly spread over the chat text; no
+    # windows if the text is shorter than `minimum`
+    if isinstance(chat, (str, bytes, bytearray, memoryview, mmap.mmap)):
+        total = len(chat)
+        if total < max(minimum, windows * size + 1):
+            return [], total
+        offsets = np.linspace(0, total - size, windows).astype(np.int64).tolist()
+        return [chat[offset:offset + size] for offset in offsets], total
+
+    start = chat.tell()
+    total = chat.seek(0, os.SEEK_END) - start
+    raw = []
+    if total >= max(minimum, windows * size + 1):
+        for offset in np.linspace(0, total - size, windows).astype(np.int64).tolist():
+            chat.seek(start + offset)
+            raw.append(chat.read(size))
+    chat.seek(start)
+    return raw, total
+
+
+def _whole_lines(raw):
+    # (lines, length kept): the lines between a window's first and last newline
+    newline = "\n" if isinstance(raw, str) else b"\n"
+    first, last = raw.find(newline), raw.rfind(newline)
+    if first < 0 or last <= first:
+        return [], 0
+    kept = raw[first + 1:last]
+    text = kept if isinstance(kept, str) else bytes(kept).decode("utf-8", errors="ignore")
+    return [preprocess_line(line) for line in text.split("\n")], len(kept) + 1
+
+
+def build_preview(source, sample_bytes=PREVIEW_BYTES, windows=PREVIEW_WINDOWS):
+    """
+    Preview of an export (any source open_chat() accepts), or None when it
+    is too small to need one or no message was sampled. File-like sources
+    must be seekable; they are left where they were.
+    """
+    with open_chat(source) as chat:
+        if hasattr(chat, "seekable") and not chat.seekable():
+            return None
+        raw, total = _windows(chat, windows, max(sample_bytes // windows, 1), PREVIEW_MIN_BYTES)
+    if not raw:
+        return None
+
+    sampled = [_whole_lines(window) for window in raw]
+    kept = sum(length for _, length in sampled)
+    fmt = detect_format([line for lines, _ in sampled for line in lines][:FORMAT_SAMPLE_LINES])
+
+    users, messages, dates, times = [], [], [], []
+    for lines, _ in sampled:
+        for date, time, user, message in iter_messages(lines, fmt.pattern):
+            dates.append(date)
+            times.append(time)
+            users.append(user)
+            messages.append(message)
+    if not messages:
+        return None
+
+    sketch = ChatSketch()
+    stamps, _ = parse_datetimes_settled(dates, times, fmt)
+    sketch.update(users, messages, stamps)
+    return Preview(sketch, kept / total)
@@ -0,0 +1,234 @@
+# report_cache.py — CONTENT-HASH KEYED REPORT CACHE (LRU + OPTIONAL DISK SPILL)
+
+import os
+import sys
+import mmap
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from chat_source import open_chat
+
+# Bump when the report layout changes so stale spilled reports are ignored
+# (and pruned); the parsed messages store has its own chat_store.STORE_VERSION
+CACHE_VERSION = "7"
+
+# Defaults can be tuned per deployment without code changes
+DEFAULT_MAX_BYTES = int(os.environ.get("CHAT_CACHE_MAX_MB", "512")) * 1024 * 1024
+DEFAULT_SPILL_DIR = os.environ.get("CHAT_CACHE_DIR") or None
+
+HASH_CHUNK_SIZE = 1 << 20
+
+SPILL_SUFFIX = ".report.pkl"
+
+
+# --------------------------------------------------------
+#                CONTENT HASH
+# --------------------------------------------------------
+def content_hash(source, chunk_size=HASH_CHUNK_SIZE):
+    """
+    SHA-256 of the export bytes (str, bytes, path or file-like); for a .zip
+    export, of its chat text, so it hashes like the same chat as a .txt.
+    File-like objects are read in chunks and rewound afterwards so the same
+    upload can still be handed to the parser.
+    """
+    h = hashlib.sha256()
+
+    if isinstance(source, str):
+        h.update(source.encode("utf-8", errors="ignore"))
+        return h.hexdigest()
+
+    with open_chat(source) as chat:
+        if isinstance(chat, (bytes, bytearray, memoryview, mmap.mmap)):
+            # hashed in place (a memory-mapped file is not copied)
+            with memoryview(chat) as view:
+                h.update(view)
+            return h.hexdigest()
+
+        start = chat.tell() if chat.seekable() else None
+        digest = _hash_stream(h, chat, chunk_size)
+        if start is not None:
+            chat.seek(start)
+        return digest
+
+
+def _hash_stream(h, f, chunk_size):
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        h.update(chunk.encode("utf-8", errors="ignore") if isinstance(chunk, str) else chunk)
+    return h.hexdigest()
+
+
+def value_nbytes(value):
+    """
+    Approximate in-memory footprint of one report value (frames, arrays,
+    Counters and the containers holding them).
+    """
+    if hasattr(value, "memory_usage"):
+        # pandas frame / series, object strings included
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):
+        # numpy arrays, RollupCube, UniqueMessages
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(value_nbytes(k) + value_nbytes(v) for k, v in list(value.items()))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(value_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def report_nbytes(report):
+    """
+    Approximate in-memory footprint of a report: every value computed so
+    far (a LazyReport keeps these sizes up to date as metrics are filled in).
+    """
+    if hasattr(report, "nbytes"):
+        return report.nbytes
+    return sum(value_nbytes(value) for value in report.values())
+
+
+# --------------------------------------------------------
+#                LRU CACHE
+# --------------------------------------------------------
+class ReportCache:
+    """
+    Size-bounded LRU of analysis reports keyed by content hash.
+    Entries evicted from memory are pickled to `spill_dir` (if set) and
+    transparently reloaded on the next lookup. An entry's size is measured
+    again whenever it is looked up, so metrics filled in after put() count
+    towards the budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=DEFAULT_SPILL_DIR):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()   # key -> (report, nbytes)
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._prune_spilled()
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        path = self._spill_path(key)
+        return path is not None and os.path.exists(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                report = self._entries[key][0]
+                self._store(key, report)
+                return report
+
+        report = self._load_spilled(key)
+        if report is not None:
+            self.put(key, report)
+        return report
+
+    def put(self, key, report):
+        with self._lock:
+            self._store(key, report)
+        return report
+
+    def get_or_compute(self, key, compute):
+        report = self.get(key)
+        if report is None:
+            report = self.put(key, compute())
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    # ------------------ internals ------------------
+    def _store(self, key, report):
+        # (re-)measure `key` as the most recently used entry, then evict
+        nbytes = report_nbytes(report)
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key)[1]
+        self._entries[key] = (report, nbytes)
+        self._nbytes += nbytes
+        self._evict(keep=key)
+
+    def _evict(self, keep):
+        # always keep the newest entry, even if it alone exceeds the budget
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            key, (report, nbytes) = self._entries.popitem(last=False)
+            if key == keep:
+                self._entries[key] = (report, nbytes)
+                continue
+            self._nbytes -= nbytes
+            self._spill(key, report)
+
+    def _spill_path(self, key):
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"{key}.v{CACHE_VERSION}{SPILL_SUFFIX}")
+
+    def _prune_spilled(self):
+        # reports spilled by other CACHE_VERSIONs are never loaded again
+        current = f".v{CACHE_VERSION}{SPILL_SUFFIX}"
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(SPILL_SUFFIX) and not name.endswith(current):
+                try:
+                    os.remove(os.path.join(self.spill_dir, name))
+                except OSError:
+                    pass
+
+    def _spill(self, key, report):
+        path = self._spill_path(key)
+        if path is None or os.path.exists(path):
+            return
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _load_spilled(self, key):
+        path = self._spill_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+
+# One cache per process, shared by every Streamlit page
+REPORT_CACHE = ReportCache()
+
+
+def cached_analyze(source, analyze=None, cache=REPORT_CACHE):
+    """
+    Return (key, report) for an export, analysing it only on a cache miss.
+    """
+    key = content_hash(source)
+    if analyze is None:
+        # falls through to a plain analyze_text() when CHAT_STORE_DIR is unset
+        from chat_store import analyze_stored
+        return key, cache.get_or_compute(key, lambda: analyze_stored(source, key))
+    return key, cache.get_or_compute(key, lambda: analyze(source))
@@ -0,0 +1,269 @@
+# rollup.py — TIME-BUCKET ROLLUP CUBE (USER x DATE x HOUR, WITH WEEKDAY)
+#
+# One pass over the messages counts them per (user, date, hour) cell; the
+# weekday follows from the date (extend_rollup() adds the messages of a
+# longer export of the same chat to its cube). The cube is sparse: only cells holding
+# messages are kept, sorted by (user, date, hour), so one user's cells are
+# a contiguous slice. Every row remembers its cell, so sentiment sums per
+# cell are a single weighted np.bincount once sentiment has been scored
+# (the heatmap and timelines never wait for it). Heatmap, daily / monthly
+# timelines and daily sentiment means, overall or per user, are bincounts
+# over the (few) cells instead of groupbys over every message.
+
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+HOURS = 24
+
+# Key spaces up to this many cells are counted with a dense np.bincount
+# (8 bytes per cell, transient); larger ones are sorted with np.unique
+DENSE_CELLS = 1 << 21
+
+
+class RollupCube:
+    """
+    Message counts of a chat per (user, date, hour) cell that has messages.
+    `users` are the user names (cell user codes index them), `dates` the
+    calendar days from the first to the last message (cell day codes index
+    them); `row_cell` maps every message row to its cell (-1 if undated).
+    """
+
+    def __init__(self, users, dates, user, day, hour, count, row_cell):
+        self.users = users
+        self.dates = dates
+        self.user = user
+        self.day = day
+        self.hour = hour
+        self.count = count
+        self.row_cell = row_cell
+        # per-day calendar lookups, shared by every reduction
+        self.day_weekday = dates.weekday.to_numpy(np.int32)
+        self.day_month = (
+            (dates.year.to_numpy(np.int32) - dates[0].year) * 12 + dates.month.to_numpy(np.int32) - 1
+            if len(dates) else np.zeros(0, dtype=np.int32)
+        )
+
+    def __len__(self):
+        return len(self.count)
+
+    @property
+    def nbytes(self):
+        arrays = (self.user, self.day, self.hour, self.count, self.row_cell, self.day_weekday, self.day_month)
+        return sum(a.nbytes for a in arrays)
+
+    def cells(self, user=None):
+        """
+        Slice of the cells of `user`: all cells for None, none for a name
+        that is not in the chat.
+        """
+        if user is None:
+            return slice(None)
+        try:
+            code = self.users.get_loc(user)
+        except KeyError:
+            return slice(0, 0)
+        lo, hi = np.searchsorted(self.user, [code, code + 1])
+        return slice(lo, hi)
+
+    def _per_day(self, user, weights):
+        cells = self.cells(user)
+        return np.bincount(self.day[cells], weights=weights[cells], minlength=len(self.dates))
+
+    # ----------------------------------------------------
+    def heatmap(self, user=None):
+        """
+        Weekday x hour message counts (7 x 24 DataFrame, Monday first).
+        """
+        cells = self.cells(user)
+        flat = self.day_weekday[self.day[cells]] * HOURS + self.hour[cells].astype(np.int32)
+        grid = np.bincount(flat, weights=self.count[cells], minlength=7 * HOURS).astype(np.int64)
+        return pd.DataFrame(
+            grid.reshape(7, HOURS),
+            index=pd.Index(WEEKDAYS, name="day_name"),
+            columns=pd.RangeIndex(HOURS, name="hour"),
+        )
+
+    def weekdays(self, user=None):
+        """
+        Message counts per weekday (Series, Monday first).
+        """
+        return self.heatmap(user).sum(axis=1).rename("messages")
+
+    def daily(self, user=None):
+        """
+        Messages per date, for the dates that have messages.
+        """
+        per_day = self._per_day(user, self.count).astype(np.int64)
+        active = np.flatnonzero(per_day)
+        return pd.Series(per_day[active], index=self.dates[active].rename("date"), name="messages")
+
+    def monthly(self, user=None):
+        """
+        Messages per calendar month: DataFrame (year, month, count) in
+        date order, months with messages only.
+        """
+        per_day = self._per_day(user, self.count)
+        per_month = np.bincount(self.day_month, weights=per_day).astype(np.int64) if len(per_day) else per_day
+        active = np.flatnonzero(per_month)
+        return pd.DataFrame({
+            "year": self.dates[0].year + active // 12 if len(active) else active,
+            "month": pd.Categorical.from_codes(active % 12, MONTHS),
+            "count": per_month[active],
+        })
+
+    def month_names(self, user=None):
+        """
+        Messages per month name over all years (busiest first).
+        """
+        monthly = self.monthly(user)
+        counts = monthly.groupby("month", observed=True)["count"].sum()
+        return counts.sort_values(ascending=False, kind="stable").rename("messages").astype(np.int64)
+
+    # ----------------------------------------------------
+    def sentiment_sums(self, sentiment):
+        """
+        Sum of the per-message `sentiment` values in every cell (missing
+        scores count as 0, like the Sentiment page's fillna(0)).
+        """
+        values = np.nan_to_num(np.asarray(sentiment, dtype=np.float64))
+        dated = self.row_cell >= 0
+        return np.bincount(self.row_cell[dated], weights=values[dated], minlength=len(self))
+
+    def daily_sentiment(self, sums, user=None, fill=True):
+        """
+        Mean sentiment per date from `sums` (see sentiment_sums). With
+        `fill`, every date between the first and last message is present,
+        0 where there were no messages (as resample("D").mean().fillna(0)).
+        """
+        counts = self._per_day(user, self.count)
+        totals = self._per_day(user, sums)
+        active = np.flatnonzero(counts)
+        if fill and len(active):
+            days = np.arange(active[0], active[-1] + 1)
+            means = np.divide(totals[days], counts[days], out=np.zeros(len(days)), where=counts[days] > 0)
+        else:
+            days = active
+            means = totals[days] / counts[days]
+        return pd.Series(means, index=self.dates[days].rename("date"), name="sentiment")
+
+
+def build_rollup(df):
+    """
+    RollupCube of a messages frame (uses user, datetime, only_date, hour).
+    """
+    users = df["user"]
+    if isinstance(users.dtype, pd.CategoricalDtype):
+        user_codes, names = users.cat.codes.to_numpy(np.int64), users.cat.categories
+    else:
+        user_codes, names = pd.factorize(users)
+        user_codes = user_codes.astype(np.int64)
+
+    dated = (df["datetime"].notna() & (user_codes >= 0)).to_numpy()
+    day_numbers = df["only_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    rows = np.flatnonzero(dated)
+    row_cell = np.full(len(df), -1, dtype=np.int32 if len(df) < 2 ** 31 else np.int64)
+
+    if not len(rows):
+        empty = np.zeros(0, dtype=np.int32)
+        return RollupCube(pd.Index(names), pd.DatetimeIndex([]), empty, empty, empty.astype(np.int8), empty, row_cell)
+
+    first = day_numbers[rows].min()
+    n_days = int(day_numbers[rows].max() - first) + 1
+    dates = pd.date_range(pd.Timestamp(np.datetime64(int(first), "D")), periods=n_days, freq="D")
+
+    day = day_numbers[rows] - first
+    hour = df["hour"].to_numpy(np.int64, na_value=0)[rows]
+    key = (user_codes[rows] * n_days + day) * HOURS + hour
+
+    space = len(names) * n_days * HOURS
+    if space <= DENSE_CELLS:
+        counts = np.bincount(key, minlength=space)
+        keys = np.flatnonzero(counts)
+        cell_of_key = np.cumsum(counts > 0) - 1
+        row_cell[rows] = cell_of_key[key]
+        count = counts[keys]
+    else:
+        keys, inverse, count = np.unique(key, return_inverse=True, return_counts=True)
+        row_cell[rows] = inverse
+
+    return RollupCube(
+        pd.Index(names),
+        dates,
+        (keys // HOURS // n_days).astype(np.int32),
+        (keys // HOURS % n_days).astype(np.int32),
+        (keys % HOURS).astype(np.int8),
+        count.astype(np.int32),
+        row_cell,
+    )
+
+
+def _user_names(df):
+    # user names in the order build_rollup() codes them
+    users = df["user"]
+    if isinstance(users.dtype, pd.CategoricalDtype):
+        return pd.Index(users.cat.categories)
+    return pd.Index(pd.unique(users.dropna()))
+
+
+def extend_rollup(base, reused, df):
+    """
+    RollupCube of the messages frame `df`, whose first `reused` rows are
+    messages of the chat the cube `base` was built from. Only the rows after
+    them are counted; the base messages after `reused` (re-parsed in `df`)
+    are taken out of their cells.
+    """
+    tail = df.iloc[reused:]
+    part = build_rollup(tail)
+    users = _user_names(df)
+    users = users.append(base.users.difference(users, sort=False))
+
+    count = base.count.astype(np.int64)
+    dropped = base.row_cell[reused:]
+    np.subtract.at(count, dropped[dropped >= 0], 1)
+
+    # (user, absolute day, hour) of every cell of both cubes
+    def cells(cube):
+        first = cube.dates[0] if len(cube.dates) else pd.Timestamp(0)
+        day0 = np.datetime64(first, "D").astype(np.int64)
+        return users.get_indexer(cube.users)[cube.user], day0 + cube.day, cube.hour.astype(np.int64)
+
+    (bu, bd, bh), (tu, td, th) = cells(base), cells(part)
+    user, day, hour = np.concatenate([bu, tu]), np.concatenate([bd, td]), np.concatenate([bh, th])
+    weights = np.concatenate([count, part.count.astype(np.int64)])
+
+    row_cell = np.full(reused + len(tail), -1, dtype=np.int32 if reused + len(tail) < 2 ** 31 else np.int64)
+    live = weights > 0
+    if not live.any():
+        empty = np.zeros(0, dtype=np.int32)
+        return RollupCube(users, pd.DatetimeIndex([]), empty, empty, empty.astype(np.int8), empty, row_cell)
+
+    first = int(day[live].min())
+    n_days = int(day[live].max()) - first + 1
+    key = (user * n_days + np.maximum(day - first, 0)) * HOURS + hour
+    keys, inverse = np.unique(np.where(live, key, -1), return_inverse=True)
+    totals = np.bincount(inverse, weights=np.where(live, weights, 0), minlength=len(keys)).astype(np.int64)
+
+    # cell numbers of the kept (non-empty) keys; -1 for emptied cells
+    kept = (keys >= 0) & (totals > 0)
+    number = np.where(kept, np.cumsum(kept) - 1, -1)
+    cell_of = number[inverse]
+    base_rows = base.row_cell[:reused]
+    row_cell[:reused] = np.where(base_rows >= 0, cell_of[:len(count)][base_rows], -1)
+    row_cell[reused:] = np.where(part.row_cell >= 0, cell_of[len(count):][part.row_cell], -1)
+
+    keys, totals = keys[kept], totals[kept]
+    dates = pd.date_range(pd.Timestamp(np.datetime64(first, "D")), periods=n_days, freq="D")
+    return RollupCube(
+        users,
+        dates,
+        (keys // HOURS // n_days).astype(np.int32),
+        (keys // HOURS % n_days).astype(np.int32),
+        (keys % HOURS).astype(np.int8),
+        totals.astype(np.int32),
+        row_cell,
+    )
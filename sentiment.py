@@ -0,0 +1,218 @@
+# sentiment.py — VECTORIZED BATCH SENTIMENT (TEXTBLOB PATTERN LEXICON)
+#
+# Scores a whole message column at once with the same lexicon and the same
+# rules as TextBlob's PatternAnalyzer (intensifiers, negation, "!" boost,
+# emoticons), but on flat NumPy token arrays instead of one TextBlob per row.
+#
+# Agreement with TextBlob(s).sentiment.polarity: |diff| <= POLARITY_TOLERANCE
+# for >= 99% of chat messages. Differences come from the rare rule paths
+# that are not vectorized: negation *inside* a modifier chain ("really not
+# good"), sarcasm "(!)", and TextBlob's abbreviation-aware punctuation split.
+# Throughput: ~25x TextBlob on 1M chat messages in a single process.
+# benchmarks/bench_sentiment.py checks both.
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from words import token_regex, tokenize
+
+POLARITY_TOLERANCE = 0.05
+
+# Processes used by polarity_scores() callers that opt in (1 = in-process)
+SENTIMENT_WORKERS = int(os.environ.get("CHAT_SENTIMENT_WORKERS", "1"))
+
+# Messages scored per vectorized batch (bounds the token arrays' memory)
+BATCH_SIZE = 200_000
+
+NEGATIONS = ("no", "not", "n't", "never")
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+
+_lexicon_cache = {}
+
+
+# --------------------------------------------------------
+#                LEXICON
+# --------------------------------------------------------
+def _lexicon():
+    """
+    (token regex, words, polarity, intensity, is_modifier, emoticons,
+    emoticon polarity), built once per process from TextBlob's pattern
+    sentiment lexicon.
+    """
+    if "lexicon" in _lexicon_cache:
+        return _lexicon_cache["lexicon"]
+
+    from textblob.en import sentiment as pattern_sentiment
+    from textblob._text import EMOTICONS
+
+    pattern_sentiment.load()
+    words, pol, inten, mod = [], [], [], []
+    for w, by_pos in dict.items(pattern_sentiment):
+        p, _, i = by_pos[None]
+        words.append(w)
+        pol.append(p)
+        inten.append(i)
+        mod.append(any(tag in by_pos for tag in pattern_sentiment.modifiers))
+
+    # emoticons are scored as standalone assessments, not lexicon words
+    emoticons = {}
+    for (_, p), faces in EMOTICONS.items():
+        for face in faces:
+            emoticons.setdefault(face.lower(), p)
+
+    # emoticons only count when whitespace-delimited and in their own case
+    # (":D" yes, ":d" or "x:D" no), like TextBlob's tokenizer
+    original_faces = sorted({f for group in EMOTICONS.values() for f in group}, key=len, reverse=True)
+    token_re = token_regex(
+        r"(?<!\S)(?:" + "|".join(re.escape(f) for f in original_faces) + r")(?=[.!?]*(?:\s|$))"
+        + r"|\w+(?:[-*]\w+)*|\.\.\.|[^\w\s]"
+    )
+
+    lex = (
+        token_re,
+        pd.Index(words),
+        np.asarray(pol, dtype=np.float64),
+        np.asarray(inten, dtype=np.float64),
+        np.asarray(mod, dtype=bool),
+        pd.Index(list(emoticons)),
+        np.asarray(list(emoticons.values()), dtype=np.float64),
+    )
+    _lexicon_cache["lexicon"] = lex
+    return lex
+
+
+def _prev_in_stream(mask, msg):
+    """
+    For every token, the index of the closest earlier token with mask=True
+    in the same message (-1 if none).
+    """
+    n = len(mask)
+    last = np.maximum.accumulate(np.where(mask, np.arange(n), -1))
+    prev = np.empty(n, dtype=np.int64)
+    prev[:1] = -1
+    prev[1:] = last[:-1]
+    has = prev >= 0
+    has[has] = msg[prev[has]] == msg[has]
+    prev[~has] = -1
+    return prev
+
+
+# --------------------------------------------------------
+#                BATCH SCORER
+# --------------------------------------------------------
+def _score_batch(texts):
+    token_re, index, pol, inten, modifier, emo_index, emo_pol = _lexicon()
+
+    n_msgs = len(texts)
+    # case is kept for the emoticons (":D" yes, ":d" no)
+    tokens, msg = tokenize(texts, token_re, lower=False)
+    if not len(tokens):
+        return np.zeros(n_msgs)
+
+    # factorize once: every per-token attribute is looked up on the (small)
+    # vocabulary and gathered back by code
+    codes, vocab = pd.factorize(tokens)
+    vocab = pd.Index(vocab, dtype=object).str.lower()
+
+    v_idx = index.get_indexer(vocab)
+    v_known = v_idx >= 0
+    v_safe = np.where(v_known, v_idx, 0)
+    v_emo = emo_index.get_indexer(vocab)
+    v_is_emo = ~v_known & (v_emo >= 0)
+    v_pol = np.where(v_known, pol[v_safe], 0.0)
+    v_pol[v_is_emo] = emo_pol[v_emo[v_is_emo]]
+    v_mod = v_known & modifier[v_safe]
+
+    lengths = np.asarray(vocab.str.len())[codes]
+    known = v_known[codes]
+    p = v_pol[codes]
+    i = np.where(v_known, inten[v_safe], 1.0)[codes]
+    is_mod = v_mod[codes]
+    is_ly_mod = (v_mod & np.asarray(vocab.str.endswith("ly"), dtype=bool))[codes]
+    is_neg = vocab.isin(NEGATIONS)[codes]
+    is_excl = (vocab == "!")[codes]
+    is_emo = v_is_emo[codes]
+
+    # a known word right after a known modifier ("very good") joins its group;
+    # unknown words of <= 2 chars do not break that link ("really is a good").
+    # An unknown negation right after an "-ly" modifier ("really not") negates
+    # that modifier's group instead and keeps the link alive.
+    unknown_neg = is_neg & ~known
+    fired = np.zeros(len(codes), dtype=bool)
+    while True:
+        prev_m = _prev_in_stream((known | (lengths > 2)) & ~fired, msg)
+        linked = prev_m >= 0
+        linked[linked] = is_mod[prev_m[linked]]
+        now_fired = unknown_neg & (prev_m >= 0)
+        now_fired[now_fired] = is_ly_mod[prev_m[now_fired]]
+        if (now_fired == fired).all():
+            break
+        fired = now_fired
+
+    absorbed = known & linked
+    starts = (known & ~absorbed) | is_emo
+    group_of = np.cumsum(starts) - 1
+
+    # a negation carries over 1-char tokens ("not a good") and negates the
+    # group of the next known word; known words end it
+    live_neg = is_neg & ~fired
+    kwords = np.flatnonzero(known)
+    prev_n = _prev_in_stream(known | is_neg | (lengths > 1), msg)[kwords]
+    hit = prev_n >= 0
+    hit[hit] = live_neg[prev_n[hit]]
+    negated_word = np.zeros(len(codes), dtype=bool)
+    negated_word[kwords[hit]] = True
+
+    # a negated modifier weakens the word it modifies instead of
+    # intensifying it ("not very good": good / 1.3), then the group is negated
+    value = p.copy()
+    scale = np.where(negated_word, 1.0 / i, i)
+    value[absorbed] = np.clip(p[absorbed] * scale[prev_m[absorbed]], -1.0, 1.0)
+
+    kpos = np.flatnonzero(known | is_emo)
+    if not len(kpos):
+        return np.zeros(n_msgs)
+    kstart = starts[kpos]
+    is_last = np.append(kstart[1:], True)
+    gpos = kpos[kstart]
+    group_msg = msg[gpos]
+    group_val = value[kpos][is_last]
+
+    # "!" boosts the latest group of its message
+    epos = np.flatnonzero(is_excl)
+    if len(epos):
+        target = group_of[epos]
+        ok = target >= 0
+        ok[ok] = group_msg[target[ok]] == msg[epos[ok]]
+        boosts = np.bincount(target[ok], minlength=len(gpos))
+        group_val = np.clip(group_val * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+    negated = np.zeros(len(gpos), dtype=bool)
+    negated[group_of[kwords[hit]]] = True
+    negated[group_of[prev_m[fired]]] = True
+    group_val = np.where(negated, group_val * NEGATION_FACTOR, group_val)
+
+    totals = np.bincount(group_msg, weights=group_val, minlength=n_msgs)
+    counts = np.bincount(group_msg, minlength=n_msgs)
+    return totals / np.maximum(counts, 1)
+
+
+def polarity_scores(messages, workers=None, batch_size=BATCH_SIZE):
+    """
+    Polarity in [-1, 1] for every message (same interface as mapping
+    TextBlob(s).sentiment.polarity over the column). Batches are spread over
+    `workers` processes when workers > 1.
+    """
+    texts = [str(m) for m in messages]
+    batches = [texts[k:k + batch_size] for k in range(0, len(texts), batch_size)]
+
+    if workers and workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_score_batch, batches))
+    else:
+        parts = [_score_batch(b) for b in batches]
+
+    return np.concatenate(parts) if parts else np.zeros(0)
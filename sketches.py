@@ -0,0 +1,426 @@
+# sketches.py — APPROXIMATE MODE FOR VERY LARGE CHATS (MERGEABLE SKETCHES)
+#
+# sketch_chat() reads an export in batches of messages and folds each batch
+# into a ChatSketch, which is all that is kept, so memory stays the same
+# however long the chat is:
+#   - top words / emoji / senders: a count-min sketch plus the k items with
+#     the highest estimates (a heap of candidates refreshed every batch);
+#   - distinct words / active users: HyperLogLog;
+#   - timelines: one counter per calendar day and a 7 x 24 weekday x hour
+#     histogram (exact; their size depends on the chat's date span only);
+#   - message / word / media / link totals: exact running sums.
+#
+# Error bounds (also returned by ChatSketch.error_bounds() for display):
+#   - count-min: an estimate is never below the true count and exceeds it
+#     by at most epsilon x N (N = items counted) with probability 1 - delta;
+#     width = ceil(e / epsilon), depth = ceil(ln(1 / delta)). The top-k list
+#     can miss or misorder items whose counts are within that bound.
+#   - HyperLogLog with 2^p registers: relative standard error 1.04 / sqrt(2^p)
+#     (0.81% at p = 14); within 2 standard errors ~95% of the time.
+# Every sketch merges with another built with the same parameters (e.g. the
+# sketches of chunks of a chat parsed in parallel) into the sketch of both.
+
+import os
+import numpy as np
+import pandas as pd
+from chat_parser import iter_batches, parse_datetimes, parse_datetimes_settled
+from chat_source import open_chat
+from features import unique_messages, link_counts, extract_emojis, media_flags
+from rollup import WEEKDAYS, MONTHS, HOURS
+from words import tokenize, stopwords
+
+# Count-min accuracy: overestimate <= EPSILON x N with probability 1 - DELTA
+EPSILON = float(os.environ.get("CHAT_SKETCH_EPSILON", "1e-4"))
+DELTA = float(os.environ.get("CHAT_SKETCH_DELTA", "0.01"))
+
+# HyperLogLog registers: 2^HLL_PRECISION bytes
+HLL_PRECISION = int(os.environ.get("CHAT_SKETCH_HLL_PRECISION", "14"))
+
+# Messages parsed and folded per batch (peak memory grows with it, speed doesn't)
+BATCH_MESSAGES = int(os.environ.get("CHAT_SKETCH_BATCH", "20000"))
+
+# Items kept per top list (the exact report keeps as many)
+TOP_WORDS = 100
+TOP_EMOJI = 50
+TOP_SENDERS = 50
+
+
+def hash_items(items):
+    """
+    64-bit hashes of strings, stable across processes (so sketches built in
+    different workers merge).
+    """
+    return pd.util.hash_array(np.asarray(items, dtype=object), categorize=False)
+
+
+def _aggregate(items, weights=None):
+    # (distinct items, their total weight) of one batch
+    codes, distinct = pd.factorize(np.asarray(items, dtype=object))
+    counts = np.bincount(codes, weights=weights, minlength=len(distinct))
+    return np.asarray(distinct, dtype=object), np.rint(counts).astype(np.int64)
+
+
+# --------------------------------------------------------
+#                COUNT-MIN + TOP-K
+# --------------------------------------------------------
+class CountMinTopK:
+    """
+    Count-min sketch of item counts plus the `k` items with the highest
+    estimates. Estimates never undercount; see `error` for the bound.
+    """
+
+    def __init__(self, k, epsilon=EPSILON, delta=DELTA):
+        self.k = k
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(np.ceil(np.e / epsilon))
+        self.depth = int(np.ceil(np.log(1 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        self.top = {}   # item -> estimate
+
+    def _cells(self, items):
+        # (depth, n) counter columns, by double hashing one 64-bit hash
+        h = hash_items(items)
+        h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, items, weights=None):
+        """
+        Count `items` (each `weights` times, if given).
+        """
+        if not len(items):
+            return
+        distinct, counts = _aggregate(items, weights)
+        cells = self._cells(distinct)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(cells[row], weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+        self._refresh(distinct)
+
+    def estimate(self, items):
+        """
+        Estimated counts of `items` (int64 array).
+        """
+        if not len(items):
+            return np.zeros(0, dtype=np.int64)
+        cells = self._cells(items)
+        return self.table[np.arange(self.depth)[:, None], cells].min(axis=0)
+
+    def _refresh(self, new_items):
+        # re-rank the current top items and this batch's items by estimate
+        candidates = pd.unique(np.concatenate([np.asarray(list(self.top), dtype=object), new_items]))
+        estimates = self.estimate(candidates)
+        keep = np.argsort(-estimates, kind="stable")[:self.k]
+        self.top = dict(zip(candidates[keep].tolist(), estimates[keep].tolist()))
+
+    def most_common(self, n=None):
+        """
+        [(item, estimate)] of the top items, highest first.
+        """
+        ranked = sorted(self.top.items(), key=lambda kv: -kv[1])
+        return ranked if n is None else ranked[:n]
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("count-min sketches have different sizes")
+        self.table += other.table
+        self.total += other.total
+        self._refresh(np.asarray(list(other.top), dtype=object))
+        return self
+
+    @property
+    def error(self):
+        """
+        Upper bound of the overestimate (holds with probability 1 - delta).
+        """
+        return self.epsilon * self.total
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+
+# --------------------------------------------------------
+#                HYPERLOGLOG
+# --------------------------------------------------------
+class HyperLogLog:
+    """
+    Distinct-count estimate in 2^p one-byte registers.
+    """
+
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, items):
+        if not len(items):
+            return
+        h = hash_items(pd.unique(np.asarray(items, dtype=object)))
+        index = (h >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = position of the first 1 bit in the remaining 64 - p bits
+        bits = np.frexp(rest.astype(np.float64))[1]
+        rank = (64 - self.p - bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            # small range: linear counting over the empty registers
+            return int(round(self.m * np.log(self.m / zeros)))
+        return int(round(raw))
+
+    def merge(self, other):
+        if self.p != other.p:
+            raise ValueError("HyperLogLogs have different precisions")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self):
+        """
+        Relative standard error of count().
+        """
+        return 1.04 / np.sqrt(self.m)
+
+    @property
+    def nbytes(self):
+        return self.registers.nbytes
+
+
+# --------------------------------------------------------
+#                TIME HISTOGRAMS
+# --------------------------------------------------------
+class DayHistogram:
+    """
+    Message counts per calendar day, one counter per day from the first to
+    the last day seen; plus weekday x hour counts.
+    """
+
+    def __init__(self):
+        self.first = None                 # day number (days since 1970-01-01)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.heat = np.zeros((7, HOURS), dtype=np.int64)
+
+    def update(self, stamps):
+        stamps = pd.Series(stamps).dropna()
+        if stamps.empty:
+            return
+        days = stamps.to_numpy().astype("datetime64[D]").astype(np.int64)
+        self._add(int(days.min()), np.bincount(days - days.min()))
+        flat = stamps.dt.weekday.to_numpy() * HOURS + stamps.dt.hour.to_numpy()
+        self.heat += np.bincount(flat, minlength=7 * HOURS).reshape(7, HOURS)
+
+    def _add(self, first, counts):
+        if self.first is None:
+            self.first, self.counts = first, counts.astype(np.int64)
+            return
+        lo = min(self.first, first)
+        hi = max(self.first + len(self.counts), first + len(counts))
+        merged = np.zeros(hi - lo, dtype=np.int64)
+        merged[self.first - lo:self.first - lo + len(self.counts)] += self.counts
+        merged[first - lo:first - lo + len(counts)] += counts
+        self.first, self.counts = lo, merged
+
+    def merge(self, other):
+        if other.first is not None:
+            self._add(other.first, other.counts)
+        self.heat += other.heat
+        return self
+
+    def daily(self):
+        """
+        Messages per date, for the dates that have messages.
+        """
+        active = np.flatnonzero(self.counts)
+        dates = pd.to_datetime((self.first or 0) + active, unit="D")
+        return pd.Series(self.counts[active], index=pd.DatetimeIndex(dates, name="date"), name="messages")
+
+    def monthly(self):
+        """
+        Messages per calendar month: DataFrame (year, month, count).
+        """
+        daily = self.daily()
+        if daily.empty:
+            return pd.DataFrame({"year": [], "month": pd.Categorical([], MONTHS), "count": []})
+        per_month = daily.groupby([daily.index.year, daily.index.month]).sum()
+        return pd.DataFrame({
+            "year": per_month.index.get_level_values(0),
+            "month": pd.Categorical.from_codes(per_month.index.get_level_values(1) - 1, MONTHS),
+            "count": per_month.to_numpy(),
+        })
+
+    def heatmap(self):
+        """
+        Weekday x hour message counts (7 x 24 DataFrame, Monday first).
+        """
+        return pd.DataFrame(
+            self.heat,
+            index=pd.Index(WEEKDAYS, name="day_name"),
+            columns=pd.RangeIndex(HOURS, name="hour"),
+        )
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.heat.nbytes
+
+
+# --------------------------------------------------------
+#                CHAT SKETCH
+# --------------------------------------------------------
+class ChatSketch:
+    """
+    Bounded-memory summary of a chat, built batch by batch (update) and
+    mergeable with the sketch of another part of the same chat (merge).
+    """
+
+    def __init__(self, epsilon=EPSILON, delta=DELTA, p=HLL_PRECISION):
+        self.messages = 0
+        self.words = 0
+        self.media = 0
+        self.links = 0
+        self.first = None
+        self.last = None
+        self.top_words = CountMinTopK(TOP_WORDS, epsilon, delta)
+        self.top_emoji = CountMinTopK(TOP_EMOJI, epsilon, delta)
+        self.top_senders = CountMinTopK(TOP_SENDERS, epsilon, delta)
+        self.distinct_words = HyperLogLog(p)
+        self.users = HyperLogLog(p)
+        self.timeline = DayHistogram()
+
+    def update(self, users, messages, stamps):
+        """
+        Fold one batch of messages (aligned user / text / datetime values;
+        with `stamps` None, the datetimes are folded later by update_times).
+        """
+        messages = pd.Series(messages, dtype=object)
+        unique = unique_messages(messages)
+        texts = unique.texts.astype(str)
+        n = len(messages)
+
+        self.messages += n
+        self.words += int(texts.str.split().str.len().fillna(0).to_numpy(np.int64) @ unique.counts)
+        self.media += int(unique.counts[media_flags(texts)].sum())
+        self.links += int(link_counts(texts) @ unique.counts)
+
+        # words (stopwords left out) and emoji of each distinct text, weighted
+        tokens, owner = tokenize(texts)
+        content = ~pd.Index(tokens, dtype=object).isin(stopwords())
+        self.top_words.update(tokens[content], unique.counts[owner[content]])
+        self.distinct_words.update(tokens[content])
+
+        emojis = extract_emojis(texts).to_numpy()
+        per_text = np.fromiter(map(len, emojis), dtype=np.int64, count=len(emojis))
+        flat = np.fromiter((e for seq in emojis for e in seq), dtype=object, count=int(per_text.sum()))
+        self.top_emoji.update(flat, np.repeat(unique.counts, per_text))
+
+        self.top_senders.update(np.asarray(users, dtype=object))
+        self.users.update(np.asarray(users, dtype=object))
+
+        if stamps is not None:
+            self.update_times(stamps)
+
+    def update_times(self, stamps):
+        """
+        Fold the datetimes of one batch of messages.
+        """
+        stamps = pd.Series(stamps)
+        self.timeline.update(stamps)
+        if stamps.notna().any():
+            lo, hi = stamps.min(), stamps.max()
+            self.first = lo if self.first is None else min(self.first, lo)
+            self.last = hi if self.last is None else max(self.last, hi)
+
+    def merge(self, other):
+        for name in ("messages", "words", "media", "links"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in ("top_words", "top_emoji", "top_senders", "distinct_words", "users", "timeline"):
+            getattr(self, name).merge(getattr(other, name))
+        if other.first is not None:
+            self.first = other.first if self.first is None else min(self.first, other.first)
+            self.last = other.last if self.last is None else max(self.last, other.last)
+        return self
+
+    @property
+    def nbytes(self):
+        parts = (self.top_words, self.top_emoji, self.top_senders, self.distinct_words, self.users, self.timeline)
+        return sum(part.nbytes for part in parts)
+
+    def error_bounds(self):
+        """
+        {statistic: human-readable error bound} for display.
+        """
+        cm, hll = self.top_words, self.distinct_words
+        confidence = f"{1 - cm.delta:.0%}"
+
+        def overcount(sketch):
+            return f"overcounted by at most {sketch.error:,.0f} (with {confidence} probability), never undercounted"
+
+        return {
+            "Messages, words, media, links": "exact",
+            "Timeline and heatmap": "exact",
+            "Top words": overcount(self.top_words),
+            "Top emoji": overcount(self.top_emoji),
+            "Top senders": overcount(self.top_senders),
+            "Distinct words, active users": f"±{hll.relative_error:.2%} standard error (±{2 * hll.relative_error:.1%} at ~95%)",
+        }
+
+    def summary(self, n=25):
+        """
+        JSON-ready summary, estimates marked as such.
+        """
+        return {
+            "approximate": True,
+            "overview": {
+                "total_messages": self.messages,
+                "total_words": self.words,
+                "media_shared": self.media,
+                "links_shared": self.links,
+                "first_message": None if self.first is None else str(self.first),
+                "last_message": None if self.last is None else str(self.last),
+            },
+            "participants_estimate": self.users.count(),
+            "distinct_words_estimate": self.distinct_words.count(),
+            "top_senders": self.top_senders.most_common(n),
+            "most_common_words": self.top_words.most_common(n),
+            "emoji_analysis": self.top_emoji.most_common(n),
+            "error_bounds": self.error_bounds(),
+            "sketch_bytes": self.nbytes,
+        }
+
+
+def sketch_chat(source, progress=None, batch_size=BATCH_MESSAGES, **params):
+    """
+    ChatSketch of an export (any source open_chat() accepts), read in
+    batches of `batch_size` messages. `progress(lines)` is passed on to the
+    parser. `params` (epsilon, delta, p) size the sketches. While no batch
+    has told the day/month order apart (every day <= 12), only the date
+    and time strings of those batches are kept until one does.
+    """
+    sketch = ChatSketch(**params)
+    fmt = None
+    # (dates, times) of the batches read before the day/month order is known
+    pending = []
+    with open_chat(source) as chat:
+        for columns, batch_fmt in iter_batches(chat, batch_size, progress=progress):
+            # the first batch that tells the two orders apart settles the
+            # order for the whole chat, including the batches before it
+            stamps, fmt = parse_datetimes_settled(columns["date"], columns["time"], fmt or batch_fmt)
+            if fmt.alt_datetime_format:
+                pending.append((columns["date"], columns["time"]))
+                stamps = None
+            sketch.update(columns["user"], columns["message"], stamps)
+            if not fmt.alt_datetime_format and pending:
+                for dates, times in pending:
+                    sketch.update_times(parse_datetimes(dates, times, fmt))
+                pending = []
+
+    # never told apart: the detected order, as a full parse would use
+    for dates, times in pending:
+        sketch.update_times(parse_datetimes(dates, times, fmt))
+    return sketch
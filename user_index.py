@@ -0,0 +1,139 @@
+# user_index.py — PER-USER AGGREGATE INDEX (ONE GROUPBY PASS PER STATISTIC)
+
+from collections import Counter, namedtuple
+import numpy as np
+import pandas as pd
+from rollup import build_rollup
+from features import unique_messages, media_flags
+from words import word_counts, merge_counts
+
+OVERALL = "Overall"
+
+
+class UserStats(namedtuple("UserStats", "messages words media links word_counts emoji_counts daily monthly")):
+    """
+    Everything the Analysis page shows for one user (or OVERALL):
+    totals, word (stopwords left out) / emoji Counters, and the daily
+    (date -> messages) and monthly (month name -> messages, busiest first)
+    series.
+    """
+
+
+def _counters(counts):
+    """
+    {user: Counter} from a (user, item) -> count Series.
+    """
+    if counts.empty:
+        return {}
+    return {
+        user: Counter(dict(zip(part.index.get_level_values(1), part.tolist())))
+        for user, part in counts.groupby(level=0, sort=False, observed=True)
+    }
+
+
+def user_word_counts(df, unique=None, n=1):
+    """
+    {user: Counter} of the words (n=1) or n-grams of every sender, plus
+    OVERALL. Each distinct (sender, text) pair is tokenized once.
+    """
+    if unique is None:
+        unique = unique_messages(df["message"])
+
+    size = max(len(unique.texts), 1)
+    user_codes, users = pd.factorize(df["user"], use_na_sentinel=False)
+    pair, pairs = pd.factorize(user_codes.astype(np.int64) * size + unique.codes)
+    pair_texts = unique.texts.iloc[pairs % size]
+    pair_users = np.asarray(users, dtype=object)[pairs // size]
+
+    by_user = word_counts(pair_texts, np.bincount(pair, minlength=len(pairs)), by=pair_users, n=n, total=OVERALL)
+    counts = {user: by_user.get(user, Counter()) for user in users}
+    counts[OVERALL] = by_user[OVERALL]
+    return counts
+
+
+def _user_totals(df, unique=None):
+    """
+    {user: (messages, words, media, links, emoji Counter)} for every sender
+    of `df`, plus OVERALL. Expects the per-message "links" and "emojis"
+    columns.
+    """
+    if unique is None:
+        unique = unique_messages(df["message"])
+
+    users = df["user"]
+    # word and media counts once per distinct text
+    text = unique.texts.astype(str)
+
+    per_msg = pd.DataFrame({
+        "user": users,
+        "messages": 1,
+        "words": unique.broadcast(text.str.split().str.len().fillna(0).to_numpy("int64")),
+        "media": unique.broadcast(media_flags(text)),
+        "links": df["links"],
+    })
+    sums = per_msg.groupby("user", sort=False, observed=True).sum()
+
+    # emoji occurrences, one row each, counted per (user, item)
+    emojis = pd.DataFrame({"user": users, "item": df["emojis"]}).explode("item").dropna()
+    emoji_counts = _counters(emojis.groupby(["user", "item"], sort=False, observed=True).size())
+
+    totals = {
+        user: (int(row["messages"]), int(row["words"]), int(row["media"]), int(row["links"]),
+               emoji_counts.get(user, Counter()))
+        for user, row in sums.iterrows()
+    }
+    totals[OVERALL] = (
+        len(df), int(per_msg["words"].sum()), int(per_msg["media"].sum()), int(per_msg["links"].sum()),
+        Counter(emojis["item"].value_counts().to_dict()),
+    )
+    return totals
+
+
+def _index(totals, cube, words):
+    # {user: UserStats} from _user_totals()-style totals, OVERALL last
+    users = [user for user in totals if user != OVERALL] + [OVERALL]
+    return {
+        user: UserStats(
+            *totals[user][:4], words.get(user, Counter()), totals[user][4],
+            cube.daily(None if user == OVERALL else user),
+            cube.month_names(None if user == OVERALL else user),
+        )
+        for user in users
+    }
+
+
+def build_user_index(df, cube=None, unique=None, words=None):
+    """
+    {user: UserStats} for every sender plus OVERALL, computed once for the
+    whole chat. Expects the per-message "links" and "emojis" columns.
+    Timelines come from the chat's RollupCube, text statistics from its
+    UniqueMessages and word counts from user_word_counts() (all built here
+    if not given).
+    """
+    if cube is None:
+        cube = build_rollup(df)
+    if unique is None:
+        unique = unique_messages(df["message"])
+    if words is None:
+        words = user_word_counts(df, unique)
+    return _index(_user_totals(df, unique), cube, words)
+
+
+def extend_user_index(index, tail, dropped, cube, words):
+    """
+    build_user_index() of a chat extended by the messages frame `tail`,
+    from the `index` of the chat before, less its messages in `dropped`
+    (re-parsed in `tail`). Only those two frames are scanned; word counts
+    and timelines come from the extended chat's `words` and `cube`.
+    """
+    added, removed = _user_totals(tail), _user_totals(dropped)
+    totals = {}
+    for user in dict.fromkeys([*index, *added]):
+        parts = [index[user][:4] + (index[user].emoji_counts,)] if user in index else []
+        parts += [added[user]] if user in added else []
+        gone = removed.get(user)
+        sums = [sum(part[i] for part in parts) - (gone[i] if gone else 0) for i in range(4)]
+        if sums[0] > 0 or user == OVERALL:
+            emoji = merge_counts([part[4] for part in parts], minus=[gone[4]] if gone else [])
+            totals[user] = (*sums, emoji)
+    return _index(totals, cube, words)
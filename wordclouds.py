@@ -0,0 +1,115 @@
+# wordclouds.py — WORD CLOUDS FROM CACHED WORD COUNTS (LRU OF RENDERED PNGs)
+
+import io
+import os
+import heapq
+import threading
+from operator import itemgetter
+from collections import OrderedDict
+
+# Rendered PNGs kept per process (tunable per deployment)
+DEFAULT_MAX_BYTES = int(os.environ.get("CHAT_WORDCLOUD_CACHE_MB", "64")) * 1024 * 1024
+
+# WordCloud's own default; only this many words are ever drawn
+MAX_WORDS = 200
+
+_stopword_cache = {}
+
+
+def default_stopwords():
+    """
+    WordCloud's English stopword list (what .generate() used to drop).
+    """
+    if "stopwords" not in _stopword_cache:
+        from wordcloud import STOPWORDS
+        _stopword_cache["stopwords"] = frozenset(STOPWORDS)
+    return _stopword_cache["stopwords"]
+
+
+# --------------------------------------------------------
+#                RENDER CACHE
+# --------------------------------------------------------
+class RenderCache:
+    """
+    Size-bounded LRU of rendered images keyed by
+    (chat hash, user, width, height, stopwords).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = png
+            self._size += len(png)
+            # always keep the newest render, even if it alone exceeds the budget
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+WORDCLOUD_CACHE = RenderCache()
+
+
+# --------------------------------------------------------
+#                RENDER
+# --------------------------------------------------------
+def cloud_frequencies(word_counts, stopwords=None, max_words=MAX_WORDS):
+    """
+    The `max_words` most frequent words of a Counter, minus stopwords.
+    """
+    stop = default_stopwords() if stopwords is None else stopwords
+    return dict(heapq.nlargest(
+        max_words,
+        ((w, c) for w, c in word_counts.items() if w not in stop),
+        key=itemgetter(1),
+    ))
+
+
+def render_wordcloud(word_counts, width=800, height=400, stopwords=None,
+                     chat_key=None, user="Overall", cache=WORDCLOUD_CACHE):
+    """
+    PNG bytes of a word cloud drawn with generate_from_frequencies() from
+    already computed word counts, or None if no word is left to draw.
+    Renders are cached when the chat's content hash is known.
+    """
+    stop = default_stopwords() if stopwords is None else frozenset(stopwords)
+    key = (chat_key, user, width, height, stop) if chat_key is not None else None
+
+    if key is not None:
+        png = cache.get(key)
+        if png is not None:
+            return png
+
+    freqs = cloud_frequencies(word_counts, stop)
+    if not freqs:
+        return None
+
+    from wordcloud import WordCloud
+
+    wc = WordCloud(width=width, height=height, background_color="white", max_words=MAX_WORDS)
+    wc.generate_from_frequencies(freqs)
+    buf = io.BytesIO()
+    wc.to_image().save(buf, format="PNG")
+    png = buf.getvalue()
+
+    return cache.put(key, png) if key is not None else png
@@ -0,0 +1,186 @@
+# words.py — WORD-FREQUENCY ENGINE (VECTORIZED, STOPWORDS, N-GRAMS)
+#
+# A column of texts is lowercased and tokenized in one regex pass over the
+# joined column; tokens are factorized and counted with np.bincount,
+# optionally weighted (how often each distinct text occurs, see
+# features.UniqueMessages) and split by a group label (the sender).
+# Stopwords (English + Hinglish, stop_hinglish.txt) are a frozenset loaded
+# once per process. N-grams never cross a message, so the counts of chunks
+# of a chat add up to the counts of the whole chat: merge_counts() combines
+# the results of chunked or parallel runs.
+
+import os
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# Same word rule the Analysis page has always used for "Most Common Words"
+WORD_PATTERN = r"\b[a-zA-Z]{2,}\b"
+
+STOPWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stop_hinglish.txt")
+
+# Fragments WORD_PATTERN makes of contractions, links and WhatsApp's
+# placeholders ("don't", "https://…", "<Media omitted>"), not in the file
+CHAT_STOPWORDS = frozenset({"don", "http", "https", "www", "media", "omitted", "deleted", "edited", "null"})
+
+SEP = "\x1f"   # unit separator; joins the texts of one tokenizing pass
+
+
+def token_regex(pattern):
+    """
+    Compiled regex for tokenize(): a token matching `pattern`, or SEP.
+    """
+    return re.compile(SEP + "|" + pattern)
+
+
+_TOKEN_RE = token_regex(WORD_PATTERN)
+
+_cache = {}
+
+
+def stopwords():
+    """
+    English + Hinglish stopwords (lowercase), loaded once per process.
+    """
+    if "stopwords" not in _cache:
+        with open(STOPWORDS_FILE, encoding="utf-8") as f:
+            words = {line.strip().lower() for line in f}
+        _cache["stopwords"] = frozenset(words - {""}) | CHAT_STOPWORDS
+    return _cache["stopwords"]
+
+
+# --------------------------------------------------------
+#                TOKENS
+# --------------------------------------------------------
+def tokenize(texts, token_re=_TOKEN_RE, lower=True):
+    """
+    (tokens, owner): every token of `texts` in order (words, or what
+    `token_re` from token_regex() matches), lowercased unless `lower` is
+    False, as an object array, and the position of the text each one came
+    from.
+    """
+    # one regex pass over the whole column: texts are joined with a separator
+    # that is matched as a token of its own and marks where each text ends
+    text = pd.Series(texts).astype(str).fillna("").str.replace(SEP, " ", regex=False)
+    joined = SEP.join(text.tolist())
+    found = np.asarray(token_re.findall(joined.lower() if lower else joined), dtype=object)
+    is_sep = found == SEP
+    owner = np.cumsum(is_sep)[~is_sep]
+    return found[~is_sep], owner
+
+
+def _first_positions(codes, size):
+    # position of the first occurrence of every code
+    first = np.empty(size, dtype=np.int64)
+    positions = np.arange(len(codes))
+    first[codes[::-1]] = positions[::-1]
+    return first
+
+
+def _terms(codes, owner, vocab, stop, n):
+    """
+    (term codes, term owner, term strings) of the n-grams of a token stream.
+    An n-gram is kept if it starts and ends on a non-stopword (so "happy
+    new year" stays, "of the" goes); for n=1 that drops every stopword.
+    """
+    is_stop = vocab.isin(stop) if stop else np.zeros(len(vocab), dtype=bool)
+    m = len(codes) - n + 1
+    if m <= 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, dtype=object)
+
+    keep = (owner[n - 1:] == owner[:m]) & ~is_stop[codes[:m]] & ~is_stop[codes[n - 1:]]
+    parts = [codes[k:k + m][keep] for k in range(n)]
+
+    # n-gram codes, one factorize per extra word (keys stay < tokens x vocabulary)
+    gram, grams = parts[0], len(vocab)
+    for part in parts[1:]:
+        gram, uniques = pd.factorize(gram.astype(np.int64) * len(vocab) + part)
+        grams = len(uniques)
+    if n == 1:
+        gram, uniques = pd.factorize(gram)
+        grams = len(uniques)
+
+    first = _first_positions(gram, grams)
+    words = np.asarray(vocab, dtype=object)
+    text = words[parts[0][first]]
+    for part in parts[1:]:
+        text = text + " " + words[part[first]]
+    return gram, owner[:m][keep], text
+
+
+# --------------------------------------------------------
+#                COUNTS
+# --------------------------------------------------------
+def _counter(terms, counts):
+    # most frequent first, ties in order of first appearance
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    return Counter(dict(zip(terms[order].tolist(), counts[order].tolist())))
+
+
+def word_counts(texts, weights=None, by=None, n=1, stop=None, total=None):
+    """
+    Counter of the words (n=1) or n-grams ("good night") of `texts`, minus
+    stopwords. `weights` counts each text that many times (e.g. the counts
+    of distinct messages). With `by` (a label per text), returns
+    {label: Counter} instead, plus the counts over all texts under key
+    `total` if given. `stop` defaults to stopwords(); pass an empty set to
+    keep every word.
+    """
+    stop = stopwords() if stop is None else stop
+    tokens, owner = tokenize(texts)
+    codes, vocab = pd.factorize(tokens)
+    gram, gram_owner, terms = _terms(codes, owner, pd.Index(vocab, dtype=object), stop, n)
+    term_weights = None if weights is None else np.asarray(weights, dtype=np.float64)[gram_owner]
+
+    if by is None:
+        counts = np.bincount(gram, weights=term_weights, minlength=len(terms))
+        return _counter(terms, counts.astype(np.int64))
+
+    # one count per (label, term) pair
+    size = max(len(terms), 1)
+    group_codes, groups = pd.factorize(np.asarray(by, dtype=object)[gram_owner])
+    pair, pairs = pd.factorize(group_codes.astype(np.int64) * size + gram)
+    counts = np.bincount(pair, weights=term_weights, minlength=len(pairs)).astype(np.int64)
+    pair_group, pair_term = pairs // size, pairs % size
+
+    result = {}
+    order = np.argsort(pair_group, kind="stable")
+    bounds = np.searchsorted(pair_group[order], np.arange(len(groups) + 1))
+    for g, label in enumerate(groups):
+        sel = order[bounds[g]:bounds[g + 1]]
+        result[label] = _counter(terms[pair_term[sel]], counts[sel])
+    if total is not None:
+        result[total] = _counter(terms, np.bincount(pair_term, weights=counts, minlength=len(terms)).astype(np.int64))
+    return result
+
+
+def merge_counts(parts, minus=()):
+    """
+    Sum the word_counts() results of chunks of a chat (Counters, or
+    {label: Counter} dicts), less those of `minus` (e.g. a message counted
+    in two chunks); items whose count drops to 0 are removed.
+    """
+    merged = None
+    for part in parts:
+        if isinstance(part, Counter):
+            merged = Counter() if merged is None else merged
+            merged.update(part)
+        else:
+            merged = {} if merged is None else merged
+            for label, counter in part.items():
+                merged.setdefault(label, Counter()).update(counter)
+    merged = Counter() if merged is None else merged
+
+    for part in minus:
+        pairs = [(None, part)] if isinstance(part, Counter) else part.items()
+        for label, counter in pairs:
+            target = merged if label is None else merged.get(label)
+            if target is None:
+                continue
+            target.subtract(counter)
+            for item in counter:
+                if target.get(item, 0) <= 0:
+                    target.pop(item, None)
+    return merged